@@ -5,7 +5,9 @@ from ._astropy_init import *
 
 # For egg_info test builds to pass, put package imports here.
 if not _ASTROPY_SETUP_:
+    from .fourier import *
     from .reconstruction import *
     from .time_series import TimeSeries
+    from .loaders import *
     from .focus import *
     from .vis import *
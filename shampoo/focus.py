@@ -39,7 +39,7 @@ def cluster_focus_peaks(xyz, eps=5, min_samples=3):
     return labels
 
 
-def find_focus_plane(roi_cube, focus_on='amplitude', plot=False):
+def find_focus_plane(roi_cube, focus_on='amplitude', plot=False, unwrap_method='skimage'):
     """
     Find focus plane in a cube of reconstructed waves at different propagation
     distances.
@@ -61,6 +61,9 @@ def find_focus_plane(roi_cube, focus_on='amplitude', plot=False):
     plot : bool (optional)
         Make plots of the integral of the amplitude of the reconstructed wave
         as a function of distance. Default is False.
+    unwrap_method : {'skimage', 'dct'}, optional
+        Phase unwrapping algorithm. If 'dct', all propagation distances are unwrapped
+        at once. See `~shampoo.unwrap_phase`. Default is 'skimage'.
 
     Returns
     -------
@@ -88,9 +91,10 @@ def find_focus_plane(roi_cube, focus_on='amplitude', plot=False):
     # Do a similar integral on the unwrapped phase. The phase changes
     # most rapidly on a source near focus, so the derivative wrt propagation
     # distance of the phase integrated in space has a *minimum* near focus
-    integral_phase_wave = np.sum([unwrap_phase(roi_cube[i, ...])
-                                  for i in range(roi_cube.shape[0])],
-                                 axis=(1, 2))
+    # Propagation distances are moved to the last axis, where slices are unwrapped separately
+    unwrapped_phase = unwrap_phase(np.moveaxis(roi_cube, 0, -1),
+                                   unwrap_method=unwrap_method)
+    integral_phase_wave = np.sum(unwrapped_phase, axis=(0, 1))
     d_int_phase = np.diff(integral_phase_wave)
 
     # Measure significance of detected focus by taking the median normalized,
@@ -124,7 +128,8 @@ def _correct_limits(minimum, maximum, axis_range, edge):
     return minimum, maximum, axis_range
 
 
-def locate_specimens(wave_cube, positions, labels, distances, plots=False):
+def locate_specimens(wave_cube, positions, labels, distances, plots=False,
+                     unwrap_method='skimage'):
     """
     Identify the (x, y, z) coordinates of a specimen.
 
@@ -139,6 +144,8 @@ def locate_specimens(wave_cube, positions, labels, distances, plots=False):
         of positions, i.e., single particles detected at multiple z-planes
     distances : `~numpy.ndarray`
         Propagation distances, same length as the first axis of ``complex_cube``
+    unwrap_method : {'skimage', 'dct'}, optional
+        Phase unwrapping algorithm. See `~shampoo.focus.find_focus_plane`.
 
     Returns
     -------
@@ -178,8 +185,8 @@ def locate_specimens(wave_cube, positions, labels, distances, plots=False):
 
             # Using this cropped cube centered on the ROI, find the best focus
 
-            focus_ind_minus_margin, significance = find_focus_plane(roi_cube,
-                                                                    plot=plots)
+            focus_ind_minus_margin, significance = find_focus_plane(
+                roi_cube, plot=plots, unwrap_method=unwrap_method)
             focus_ind = focus_ind_minus_margin + zmin - z_range
 
             specimen_coordinates.append([xmedian, ymedian,
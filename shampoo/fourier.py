@@ -0,0 +1,362 @@
+"""
+This module selects the implementation of the discrete Fourier transforms used
+throughout shampoo.
+
+Three backends are available:
+
+* ``'scipy'``: `scipy.fft` (multi-threaded), or `scipy.fftpack` on older versions of SciPy;
+* ``'numpy'``: `numpy.fft`;
+* ``'pyfftw'``: the FFTW library through `pyfftw`, with caching of FFTW plans.
+
+By default, ``'pyfftw'`` is used if it is installed, and ``'scipy'`` otherwise.
+FFTW plans can be costly to create; accumulated plans ("wisdom") can be saved to
+disk with `save_fft_wisdom` and loaded in another process with `load_fft_wisdom`.
+"""
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+from multiprocessing import cpu_count
+from os.path import isfile
+import pickle
+
+import numpy as np
+
+__all__ = ['set_fft_backend', 'get_fft_backend', 'save_fft_wisdom', 'load_fft_wisdom']
+
+
+class FFTBackend(object):
+    """
+    Base class for Fourier transform backends. Transforms default to `numpy.fft`.
+
+    Parameters
+    ----------
+    workers : int, optional
+        Number of threads used by each transform. Negative values
+        count from the number of CPUs, e.g. -1 means all CPUs.
+    planner_effort : str or None, optional
+        FFTW planner effort, e.g. 'FFTW_ESTIMATE' or 'FFTW_MEASURE'. Only
+        used by the 'pyfftw' backend.
+    """
+    name = None
+
+    def __init__(self, workers=-1, planner_effort=None):
+        self.workers = workers
+        self.planner_effort = planner_effort
+
+    def __repr__(self):
+        return '<FFTBackend {}: workers={}, planner_effort={}>'.format(self.name, self.workers,
+                                                                       self.planner_effort)
+
+    @property
+    def threads(self):
+        """ Number of threads, as a positive integer """
+        if self.workers < 0:
+            return max(1, cpu_count() + 1 + self.workers)
+        return max(1, self.workers)
+
+    def fft2(self, x, axes=(-2, -1), overwrite_x=False):
+        """ Two-dimensional transform, as `numpy.fft.fft2` """
+        return np.fft.fft2(x, axes=axes)
+
+    def ifft2(self, x, axes=(-2, -1), overwrite_x=False):
+        """ Two-dimensional inverse transform, as `numpy.fft.ifft2` """
+        return np.fft.ifft2(x, axes=axes)
+
+    def rfft2(self, x, axes=(-2, -1)):
+        """ Half-spectrum transform of real input, as `numpy.fft.rfft2` """
+        return np.fft.rfft2(x, axes=axes)
+
+    def dctn(self, x, axes=(-2, -1), inverse=False):
+        """ Orthonormal discrete cosine transform of type II, or its inverse, as `scipy.fft.dctn` """
+        try:
+            from scipy.fft import dctn, idctn
+        except ImportError:
+            from scipy.fftpack import dctn, idctn
+        transform = idctn if inverse else dctn
+        return transform(x, axes=axes, norm='ortho')
+
+
+class ScipyBackend(FFTBackend):
+    name = 'scipy'
+
+    def __init__(self, *args, **kwargs):
+        super(ScipyBackend, self).__init__(*args, **kwargs)
+        try:
+            import scipy.fft as module
+            self._threaded = True
+        except ImportError:
+            import scipy.fftpack as module
+            self._threaded = False
+        self._module = module
+
+    def _kwargs(self, overwrite_x):
+        kwargs = {'overwrite_x': overwrite_x}
+        if self._threaded:
+            kwargs['workers'] = self.workers
+        return kwargs
+
+    def fft2(self, x, axes=(-2, -1), overwrite_x=False):
+        return self._module.fft2(x, axes=axes, **self._kwargs(overwrite_x))
+
+    def ifft2(self, x, axes=(-2, -1), overwrite_x=False):
+        return self._module.ifft2(x, axes=axes, **self._kwargs(overwrite_x))
+
+    def rfft2(self, x, axes=(-2, -1)):
+        # scipy.fftpack has no two-dimensional real transform
+        if not self._threaded:
+            return super(ScipyBackend, self).rfft2(x, axes=axes)
+        return self._module.rfft2(x, axes=axes, workers=self.workers)
+
+    def dctn(self, x, axes=(-2, -1), inverse=False):
+        if not self._threaded:
+            return super(ScipyBackend, self).dctn(x, axes=axes, inverse=inverse)
+        transform = self._module.idctn if inverse else self._module.dctn
+        return transform(x, axes=axes, norm='ortho', workers=self.workers)
+
+
+class NumpyBackend(FFTBackend):
+    name = 'numpy'
+
+
+class PyFFTWBackend(FFTBackend):
+    name = 'pyfftw'
+
+    def __init__(self, *args, **kwargs):
+        super(PyFFTWBackend, self).__init__(*args, **kwargs)
+        import pyfftw
+        from pyfftw.interfaces import scipy_fftpack, numpy_fft
+        # Keep FFTW objects alive between calls so that plans are reused
+        pyfftw.interfaces.cache.enable()
+        self._module = scipy_fftpack
+        self._numpy_module = numpy_fft
+
+    def _kwargs(self, overwrite_x):
+        kwargs = {'overwrite_x': overwrite_x, 'threads': self.threads}
+        if self.planner_effort is not None:
+            kwargs['planner_effort'] = self.planner_effort
+        return kwargs
+
+    def fft2(self, x, axes=(-2, -1), overwrite_x=False):
+        return self._module.fft2(x, axes=axes, **self._kwargs(overwrite_x))
+
+    def ifft2(self, x, axes=(-2, -1), overwrite_x=False):
+        return self._module.ifft2(x, axes=axes, **self._kwargs(overwrite_x))
+
+    def rfft2(self, x, axes=(-2, -1)):
+        kwargs = self._kwargs(overwrite_x=False)
+        del kwargs['overwrite_x']
+        return self._numpy_module.rfft2(x, axes=axes, **kwargs)
+
+
+_BACKENDS = {'scipy': ScipyBackend,
+             'numpy': NumpyBackend,
+             'pyfftw': PyFFTWBackend}
+
+_backend = None
+
+
+def set_fft_backend(name, workers=-1, planner_effort=None, wisdom_path=None):
+    """
+    Select the implementation of Fourier transforms.
+
+    Parameters
+    ----------
+    name : {'scipy', 'numpy', 'pyfftw'}
+        Name of the backend.
+    workers : int, optional
+        Number of threads used by each transform. Negative values count
+        from the number of CPUs. Default is all CPUs. Ignored by the 'numpy' backend.
+    planner_effort : str or None, optional
+        FFTW planner effort, e.g. 'FFTW_MEASURE'. Only used by the 'pyfftw' backend.
+    wisdom_path : str or None, optional
+        Path to a file of FFTW wisdom created by `save_fft_wisdom`. If the file exists,
+        it is loaded. Only used by the 'pyfftw' backend.
+
+    Returns
+    -------
+    backend : FFTBackend
+        The new backend.
+
+    Raises
+    ------
+    ValueError
+        If the backend name is unknown.
+    ImportError
+        If the library underlying the backend is not installed.
+    """
+    global _backend
+    try:
+        backend_class = _BACKENDS[name]
+    except KeyError:
+        raise ValueError('FFT backend {} is unknown. Available backends are '
+                         '{}'.format(name, sorted(_BACKENDS)))
+
+    backend = backend_class(workers=workers, planner_effort=planner_effort)
+    if wisdom_path is not None and isinstance(backend, PyFFTWBackend):
+        load_fft_wisdom(wisdom_path)
+    _backend = backend
+    return _backend
+
+
+def get_fft_backend():
+    """
+    Currently-selected Fourier transform backend.
+
+    Returns
+    -------
+    backend : FFTBackend
+    """
+    if _backend is None:
+        try:
+            set_fft_backend('pyfftw')
+        except ImportError:
+            set_fft_backend('scipy')
+    return _backend
+
+
+def fft2(x, axes=(-2, -1), overwrite_x=False):
+    """ Two-dimensional discrete Fourier transform, computed by the current backend. """
+    return get_fft_backend().fft2(x, axes=axes, overwrite_x=overwrite_x)
+
+
+def ifft2(x, axes=(-2, -1), overwrite_x=False):
+    """ Two-dimensional inverse discrete Fourier transform, computed by the current backend. """
+    return get_fft_backend().ifft2(x, axes=axes, overwrite_x=overwrite_x)
+
+
+def rfft2(x, axes=(-2, -1)):
+    """
+    Two-dimensional discrete Fourier transform of real input, computed by the current backend.
+    Only the non-negative frequencies of the last axis in ``axes`` are returned, as `numpy.fft.rfft2`.
+    """
+    return get_fft_backend().rfft2(x, axes=axes)
+
+
+def dctn(x, axes=(-2, -1)):
+    """ Orthonormal discrete cosine transform of type II along ``axes``, computed by the current backend. """
+    return get_fft_backend().dctn(x, axes=axes)
+
+
+def idctn(x, axes=(-2, -1)):
+    """ Inverse of `dctn`, computed by the current backend. """
+    return get_fft_backend().dctn(x, axes=axes, inverse=True)
+
+
+def real_fft2(x):
+    """
+    Full two-dimensional discrete Fourier transform of a real array ``x`` of shape (N, M).
+    This is equivalent to ``fft2(x)``, but only half of the spectrum is transformed; the other 
+    half is deduced from conjugate symmetry.
+    """
+    return hermitian_completion(rfft2(x), x.shape[-1])
+
+
+def hermitian_completion(half, n):
+    """
+    Full spectrum of a real array of shape (M, n), from its half-spectrum ``half`` 
+    as computed by `rfft2`.
+    """
+    full = np.empty(half.shape[:-1] + (n,), dtype=half.dtype)
+    full[..., :half.shape[-1]] = half
+    full[..., half.shape[-1]:] = hermitian_values(half, n, *np.mgrid[0:half.shape[0], half.shape[-1]:n])
+    return full
+
+
+def hermitian_values(half, n, rows, columns):
+    """
+    Values of the full spectrum of a real array at ``(rows, columns)``, from its 
+    half-spectrum ``half`` as computed by `rfft2`.
+
+    Parameters
+    ----------
+    half : `~numpy.ndarray`, shape (M, n//2 + 1)
+        Half-spectrum of a real array of shape (M, n).
+    n : int
+        Length of the last axis of the real array.
+    rows, columns : `~numpy.ndarray`
+        Integer indices in the full spectrum. These are broadcast together.
+
+    Returns
+    -------
+    values : `~numpy.ndarray`
+    """
+    rows, columns = np.broadcast_arrays(rows, columns)
+    in_half = columns < half.shape[-1]
+    values = np.empty(rows.shape, dtype=half.dtype)
+    values[in_half] = half[rows[in_half], columns[in_half]]
+    mirrored = np.logical_not(in_half)
+    values[mirrored] = np.conj(half[(-rows[mirrored]) % half.shape[0], (-columns[mirrored]) % n])
+    return values
+
+
+def next_fast_length(n, even=False):
+    """
+    Smallest integer larger or equal to ``n`` whose only prime factors are 2, 3, 5 and 7,
+    i.e. a length for which Fourier transforms are efficient.
+
+    Parameters
+    ----------
+    n : int
+        Minimal length.
+    even : bool, optional
+        If True, the length is also a multiple of 2.
+
+    Returns
+    -------
+    length : int
+    """
+    length = max(1, int(n))
+    while True:
+        remainder = length
+        for prime in (2, 3, 5, 7):
+            while remainder % prime == 0:
+                remainder //= prime
+        if remainder == 1 and not (even and length % 2):
+            return length
+        length += 1
+
+
+def save_fft_wisdom(path):
+    """
+    Save the FFTW plans accumulated in this process to a file.
+
+    Parameters
+    ----------
+    path : str
+        Path to the wisdom file.
+
+    Raises
+    ------
+    ImportError
+        If `pyfftw` is not installed.
+    """
+    import pyfftw
+    with open(path, 'wb') as f:
+        pickle.dump(pyfftw.export_wisdom(), f, protocol=2)
+
+
+def load_fft_wisdom(path):
+    """
+    Load FFTW plans saved with `save_fft_wisdom`.
+
+    Parameters
+    ----------
+    path : str
+        Path to the wisdom file.
+
+    Returns
+    -------
+    success : bool
+        False if the file does not exist or if its wisdom could not be imported.
+
+    Raises
+    ------
+    ImportError
+        If `pyfftw` is not installed.
+    """
+    import pyfftw
+    if not isfile(path):
+        return False
+    with open(path, 'rb') as f:
+        wisdom = pickle.load(f)
+    return all(pyfftw.import_wisdom(wisdom))
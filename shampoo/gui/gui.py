@@ -16,6 +16,7 @@ from pyqtgraph import QtCore, QtGui
 from skimage import img_as_bool
 from skimage.io import imsave
 
+from ..loaders import HologramLoader
 from ..reconstruction import Hologram, ReconstructedWave
 from ..time_series import TimeSeries
 from .fourier_mask_dialog import FourierMaskDialog
@@ -111,9 +112,9 @@ class ShampooController(QtCore.QObject, metaclass = ErrorAware):
 
         callback(0)
         with TimeSeries(name = params['filename'], mode = 'w') as t:
-            for index, path in enumerate(params['hologram_paths']):
+            holograms = HologramLoader(params['hologram_paths'], wavelength = wavelengths)
+            for index, holo in enumerate(holograms):
                 # TODO: choose time-points instead of index
-                holo = Hologram.from_tif(path, wavelength = wavelengths)
                 t.add_hologram(holo, time_point = index)
                 callback(int(100*index / total))
         callback(100); done();
@@ -4,7 +4,8 @@ import numpy as np
 import pyqtgraph as pg
 from pyqtgraph import QtGui, QtCore
 
-from ..reconstruction import Hologram, fft2, fftshift
+from ..fourier import real_fft2
+from ..reconstruction import Hologram, fftshift
 from ..time_series import TimeSeries
 
 class HologramViewer(QtGui.QWidget):
@@ -46,5 +47,5 @@ class HologramViewer(QtGui.QWidget):
         """
         self.raw_data_viewer.setImage(np.squeeze(data.hologram))
 
-        ft = fftshift(fft2(np.squeeze(data.hologram), axes = (0, 1)), axes = (0, 1))
+        ft = fftshift(real_fft2(np.squeeze(data.hologram)))
         self.fourier_plane_viewer.setImage(np.log(np.abs(ft)**2))
@@ -6,7 +6,8 @@ from skimage.io import imread
 
 from .fourier_mask_design_dialog import FourierMaskDesignDialog
 
-from ..reconstruction import Hologram
+from ..fourier import real_fft2
+from ..reconstruction import Hologram, fftshift
 from ..time_series import TimeSeries
 
 DEFAULT_PROPAGATION_DISTANCE = 0.03658
@@ -172,7 +173,7 @@ class ReconstructionParametersWidget(QtGui.QWidget):
     
     @QtCore.pyqtSlot()
     def design_fourier_mask(self):
-        ft = np.fft.fftshift(np.fft.fft2(self.hologram))
+        ft = fftshift(real_fft2(self.hologram))
         designer = FourierMaskDesignDialog(parent = self, fourier = np.log(np.abs(ft)**2))
         designer.fourier_mask.connect(self.fourier_mask_signal)
         designer.fourier_mask.connect(lambda im: self._fourier_mask_path_signal.emit('User-designed mask'))
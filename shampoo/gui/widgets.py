@@ -103,6 +103,10 @@ class ReconstructedHologramViewer(QtGui.QWidget):
 
         # Set to maximal size, since this is the star of the show
         self.resize(self.maximumSize())
+
+        # The phase is only unwrapped at the propagation distance being viewed
+        self.reconstructed = None
+        self.amplitude_viewer.sigTimeChanged.connect(self._display_phase)
     
     @QtCore.pyqtSlot(object)
     def display(self, reconstructed):
@@ -117,12 +121,22 @@ class ReconstructedHologramViewer(QtGui.QWidget):
         #axes = {0: 'x', 1:'y', 2:'t', 3:'c'}
 
         fourier_mask, depths = reconstructed.fourier_mask, reconstructed.depths
+        self.reconstructed = reconstructed
         # TODO: why flip?
         self.amplitude_viewer.setImage(img = np.swapaxes(reconstructed.intensity, 0, 2), xvals = reconstructed.depths)
-        self.phase_viewer.setImage(img = np.swapaxes(np.nan_to_num(reconstructed.phase), 0, 2), xvals = reconstructed.depths)
+        self._display_phase(self.amplitude_viewer.currentIndex)
         self.fourier_mask_viewer.setImage(img = fourier_mask)    #TODO: depths?
+    
+    @QtCore.pyqtSlot(int, float)
+    def _display_phase(self, index, time = None):
+        """ Display the phase at the propagation distance ``index`` """
+        if self.reconstructed is None or index >= len(self.reconstructed):
+            return
+        phase = self.reconstructed[index].phase[:,:,0]
+        self.phase_viewer.setImage(img = np.swapaxes(np.nan_to_num(phase), 0, 1))
         
     @QtCore.pyqtSlot()
     def clear(self):
+        self.reconstructed = None
         self.amplitude_viewer.clear()
         self.phase_viewer.clear()
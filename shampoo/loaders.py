@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""
+This module implements lazy loading of holograms from multi-page TIFF files,
+such as acquisition stacks written by cameras, and prefetched loading of
+holograms from many single-image files.
+"""
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+from collections import Sequence, deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+import warnings
+
+import numpy as np
+
+try:
+    import tifffile
+except ImportError:
+    from skimage.external import tifffile
+
+from .reconstruction import Hologram, _load_hologram
+
+__all__ = ['HologramStack', 'HologramLoader']
+
+
+class HologramStack(Sequence):
+    """
+    Lazily-indexed sequence of holograms stored as the pages of a TIFF or BigTIFF file.
+
+    Uncompressed pages are memory-mapped: accessing the hologram at index ``k`` only
+    reads the bytes of the ``k``-th page, when it is reconstructed. Compressed pages
+    are decoded on access.
+
+    Parameters
+    ----------
+    path : str
+        Path to the TIFF file.
+    kwargs
+        Keyword arguments are passed to the `~shampoo.Hologram` constructor,
+        e.g. ``wavelength`` or ``crop_fraction``.
+
+    Examples
+    --------
+    >>> with HologramStack('acquisition.tif', wavelength = 405e-9) as stack: # doctest: +SKIP
+    ...     for hologram in stack:
+    ...         wave = hologram.reconstruct(0.05)
+    """
+    def __init__(self, path, **kwargs):
+        self.path = path
+        self.hologram_kwargs = kwargs
+        self._tiff = tifffile.TiffFile(path)
+        self._buffer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self._tiff.pages)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        if index < 0:
+            index += len(self)
+        if not (0 <= index < len(self)):
+            raise IndexError('Hologram index {} out of range for a stack of {} '
+                             'holograms.'.format(index, len(self)))
+        return Hologram(self.image(index), **self.hologram_kwargs)
+
+    def close(self):
+        """ Close the underlying file. Holograms already accessed remain valid. """
+        self._tiff.close()
+        # The file mapping is released once holograms viewing it are released as well
+        self._buffer = None
+
+    def image(self, index):
+        """
+        Raw image of the page ``index``, in its native dtype. Uncompressed pages are
+        returned as read-only views of a memory-map of the file.
+
+        Parameters
+        ----------
+        index : int
+            Page index.
+
+        Returns
+        -------
+        image : `~numpy.ndarray`, ndim 2
+        """
+        page = self._tiff.pages[index]
+        if page.is_memmappable:
+            if self._buffer is None:
+                self._buffer = np.memmap(self.path, dtype = np.uint8, mode = 'r')
+            # Pages are stored in the byte order of the file, e.g. big-endian '>'
+            dtype = page.dtype.newbyteorder(self._tiff.byteorder)
+            offset = page.dataoffsets[0]
+            nbytes = int(np.prod(page.shape)) * dtype.itemsize
+            image = self._buffer[offset:offset + nbytes].view(dtype).reshape(page.shape)
+        else:
+            image = page.asarray()
+
+        # Some TIF images are saved as 3D arrays (one slice per color)
+        if image.ndim == 3:
+            warnings.warn('Page {} of {} is not grayscale. Only considering the '
+                          'first slice.'.format(index, self.path), UserWarning)
+            if page.planarconfig == 1:
+                return image[:,:,0]
+            return image[0]
+        return image
+
+
+class HologramLoader(object):
+    """
+    Iterator over holograms loaded from image files, in order. Upcoming images are
+    decoded on a pool of threads while the current hologram is being processed.
+
+    Parameters
+    ----------
+    paths : iterable of str
+        Paths to the hologram images, e.g. TIFF files.
+    workers : int, optional
+        Number of threads decoding images. Default is 2.
+    prefetch : int or None, optional
+        Maximal number of holograms loaded ahead of the one being processed. This bounds
+        the memory held by the loader. If None (default), ``2 * workers`` holograms are prefetched.
+    kwargs
+        Keyword arguments are passed to the `~shampoo.Hologram` constructor,
+        e.g. ``wavelength`` or ``crop_fraction``.
+
+    Raises
+    ------
+    ValueError
+        If ``workers`` or ``prefetch`` is smaller than 1.
+
+    Examples
+    --------
+    >>> from glob import glob
+    >>> paths = sorted(glob('*_holo.tif')) # doctest: +SKIP
+    >>> for hologram in HologramLoader(paths, workers = 4, wavelength = 405e-9): # doctest: +SKIP
+    ...     wave = hologram.reconstruct(0.05)
+    """
+    def __init__(self, paths, workers=2, prefetch=None, **kwargs):
+        if prefetch is None:
+            prefetch = 2 * workers
+        if workers < 1 or prefetch < 1:
+            raise ValueError('At least one worker and one prefetched hologram are required, '
+                             'not {} and {}.'.format(workers, prefetch))
+        self.paths = list(paths)
+        self.workers = workers
+        self.prefetch = prefetch
+        self.hologram_kwargs = kwargs
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __iter__(self):
+        paths = iter(self.paths)
+        with ThreadPoolExecutor(max_workers = self.workers) as executor:
+            pending = deque(executor.submit(self._load, path) 
+                            for path in islice(paths, self.prefetch))
+            try:
+                while pending:
+                    hologram = pending.popleft().result()
+                    # Keep the queue full while the hologram is being processed
+                    path = next(paths, None)
+                    if path is not None:
+                        pending.append(executor.submit(self._load, path))
+                    yield hologram
+            finally:
+                # If iteration stops early, do not wait on unneeded images
+                for future in pending:
+                    future.cancel()
+
+    def _load(self, path):
+        return Hologram(_load_hologram(path), **self.hologram_kwargs)
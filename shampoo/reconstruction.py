@@ -13,14 +13,19 @@ are applied [2]_.
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
-from collections import Sized, deque, defaultdict
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import cpu_count
 
+import re
+import tempfile
+import threading
 import warnings
 
-from multiprocessing import Pool 
-from functools import partial
 
 from .vis import save_scaled_image
+from .fourier import (fft2, ifft2, rfft2, dctn, idctn, hermitian_completion, hermitian_values,
+                      next_fast_length)
 
 import h5py
 import numpy as np
@@ -39,22 +44,21 @@ from astropy.convolution import convolve_fft, MexicanHat2DKernel
 import matplotlib.pyplot as plt
 from mpl_toolkits.axes_grid1 import ImageGrid
 
-import time
-
-# Try importing optional dependency PyFFTW for Fourier transforms. 
-# Numpy's fft_intel package might also be preferable
-# If the import fails, import scipy's FFT module instead
-try:
-    from pyfftw.interfaces.scipy_fftpack import fft2, ifft2
-except ImportError:
-    try:
-        from np.fft_intel import fft2, ifft2
-    except ImportError:
-        from scipy.fftpack import fft2, ifft2
-
-__all__ = ['Hologram', 'ReconstructedWave', 'unwrap_phase']
+__all__ = ['ArrayCache', 'Calibration', 'Hologram', 'ReconstructedWave', 'ReconstructionPlan', 
+           'Workspace', 'get_array_cache', 'unwrap_phase']
 RANDOM_SEED = 42
-TWO_TO_N = [2**i for i in range(13)]
+DEPTH_CHUNK_SIZE = 4
+PROPAGATION_MODES = ('direct', 'incremental')
+UNWRAP_METHODS = ('skimage', 'dct')
+OUTPUTS = ('wave', 'intensity', 'phase')
+SLICE_CACHE_SIZE = 16
+RESEED_INTERVAL = 16
+DRIFT_WINDOW = 16
+COARSE_PEAK_SEARCH_SIZE = 256
+ARRAY_CACHE_SIZE = '1GB'
+MEMORY_UNITS = {'': 1, 'B': 1, 'KB': 2**10, 'MB': 2**20, 'GB': 2**30, 'TB': 2**40}
+PRECISIONS = {'double': (np.float64, np.complex128),
+              'single': (np.float32, np.complex64)}
 
 
 def rebin_image(a, binning_factor):
@@ -101,16 +105,16 @@ def fftshift(x, additional_shift=None, axes=None):
     if additional_shift is None:
         additional_shift = [0, 0]
 
-    y = tmp
+    shifts = list()
     for k, extra_shift in zip(axes, additional_shift):
         n = tmp.shape[k]
         if (n+1)//2 - extra_shift < n:
             p2 = (n+1)//2 - extra_shift
         else:
             p2 = abs(extra_shift) - (n+1)//2
-        mylist = np.concatenate((np.arange(p2, n), np.arange(0, p2)))
-        y = np.take(y, mylist, k)
-    return y
+        shifts.append(-p2)
+    # All axes are shifted in a single copy
+    return np.roll(tmp, shifts, axis = tuple(axes)[:len(shifts)])
     
 def arrshift(x, shift, axes=None):
     """
@@ -138,17 +142,62 @@ def arrshift(x, shift, axes=None):
     elif isinstance(axes, integer_types):
         axes = (axes,)
     
-    for j, k in zip(axes, shift):
-        n = y.shape[j];
-        y = np.roll(y, (n+1)//2 - (-1)*k, axis=j)
-    
-    return y
+    shifts = [(y.shape[j]+1)//2 + k for j, k in zip(axes, shift)]
+    return np.roll(y, shifts, axis = tuple(axes)[:len(shifts)])
+
+def _parse_memory(size):
+    """
+    Number of bytes from a memory size such as ``'8GB'`` or ``512 * 2**20``.
+    Units are powers of 1024.
+    """
+    if isinstance(size, integer_types + (float,)):
+        return int(size)
+    match = re.match(r'^\s*([0-9.]+)\s*([KMGT]?B?)\s*$', str(size).upper())
+    if match is None:
+        raise ValueError('Memory size {} is invalid. Valid examples are 512MB or 8GB.'.format(size))
+    number, unit = match.groups()
+    if unit and not unit.endswith('B'):
+        unit += 'B'
+    return int(float(number) * MEMORY_UNITS[unit])
+
+def _precision_dtypes(precision):
+    """
+    Real and complex data types associated with a ``precision`` of 'double' or 'single'.
+    """
+    try:
+        return PRECISIONS[precision]
+    except KeyError:
+        raise ValueError('Precision {} is not one of {}'.format(precision, tuple(PRECISIONS)))
+
+def _centering_ramps(shape, box=(slice(None), slice(None)), dtype=np.complex128):
+    """
+    Phase ramps ``(rx, ry)`` along the first two axes of an array ``x`` of dimensions ``shape``,
+    such that the inverse Fourier transform of ``(x * np.outer(rx, ry))[box]`` is the inverse 
+    Fourier transform of ``x[box]`` shifted by ``fftshift``. Ramps vanish outside of ``box``.
+    """
+    ramps = list()
+    for b, n in zip(box, shape):
+        start, stop, _ = b.indices(n)
+        m = stop - start
+        # Shifting the inverse transform by m//2 is a modulation of its spectrum
+        ramp = np.zeros(n, dtype = dtype)
+        ramp[start:stop] = np.exp(-2j*np.pi * (np.arange(m) * (m//2) % m) / m)
+        ramps.append(ramp)
+    return tuple(ramps)
+
+def _ifft2_stack(x):
+    """
+    Inverse Fourier transform along the first two axes of a stack of arrays.
+    The input array may be overwritten.
+    """
+    return ifft2(x, axes = (0, 1), overwrite_x = True)
 
 def _load_hologram(hologram_path):
     """
     Load a hologram from path ``hologram_path`` using scikit-image and numpy.
     """
-    im = np.array(imread(hologram_path), dtype=np.float64)
+    # The image is kept in its native dtype (e.g. uint8 or uint16); see `~shampoo.Hologram`
+    im = np.asarray(imread(hologram_path))
     # Some TIF images are saved as 3D arrays (one slice per color)
     if im.ndim == 3:
         warnings.warn('Image at {} is not grayscale. Only considering the first slice.'.format(hologram_path), UserWarning)
@@ -156,20 +205,39 @@ def _load_hologram(hologram_path):
     return im
 
 
-def _find_peak_centroid(image, wavelength=405e-9, gaussian_width=10):
+def _find_peak_centroid(image, wavelength=405e-9, gaussian_width=10, downsample=None):
     """
     Smooth the image, find centroid of peak in the image.
+
+    Parameters
+    ----------
+    image : `~numpy.ndarray`, ndim 2
+        Magnitude of the Fourier transform of the hologram.
+    wavelength : float or iterable of floats
+        Wavelength(s) of the hologram. Two peaks are found for each wavelength.
+    gaussian_width : float, optional
+        Width [pixels] of the gaussian filter applied to the image.
+    downsample : int or None, optional
+        Binning factor of the image for the coarse search of peaks, which are then refined
+        at full resolution. If 1, the complete image is searched at full resolution. If None
+        (default), the image is binned down to approximately 256 x 256 pixels.
+
+    Returns
+    -------
+    peaks : `~numpy.ndarray`
+        Pixel coordinates of the peaks (len(wavelength) x 2).
     """
     wavelength = np.atleast_1d(wavelength).reshape((1,1,-1))
-    F = gaussian_filter(image, gaussian_width) # Filter with a gaussian
-    M = maximum_filter(F,3) # Get 8-neighbor maxima
-    tfm = M==F # Maxima location TF array
-    m = F[tfm] # Maxima
-    idx = m.argsort()[::-1] # Sort the maxima, get the sorted indices in descending order
-    x, y = np.nonzero(tfm) # Maxima locations
     # Grab top 2*#wavelengths + 1 peaks
-    x = x[idx[0:(2*wavelength.shape[2]+1)]]
-    y = y[idx[0:(2*wavelength.shape[2]+1)]]
+    num_peaks = 2*wavelength.shape[2] + 1
+
+    if downsample is None:
+        downsample = max(1, min(image.shape) // COARSE_PEAK_SEARCH_SIZE)
+    if downsample == 1:
+        x, y = _brightest_maxima(image, gaussian_width, num_peaks)
+    else:
+        x, y = _coarse_to_fine_maxima(image, gaussian_width, num_peaks, downsample)
+
     rsq = (x-image.shape[0]/2)**2 + (y-image.shape[1]/2)**2
     dist = np.sort(rsq)[1:] # Sort distances in ascending order
     idx = np.argsort(rsq)[1:] # Get sorted indices
@@ -187,6 +255,72 @@ def _find_peak_centroid(image, wavelength=405e-9, gaussian_width=10):
         
     return peaks
 
+def _brightest_maxima(image, gaussian_width, num_peaks):
+    """
+    Locations of the ``num_peaks`` brightest local maxima of the smoothed image,
+    in descending order of brightness.
+    """
+    F = gaussian_filter(image, gaussian_width) # Filter with a gaussian
+    M = maximum_filter(F,3) # Get 8-neighbor maxima
+    tfm = M==F # Maxima location TF array
+    m = F[tfm] # Maxima
+    x, y = np.nonzero(tfm) # Maxima locations
+    # Only the brightest maxima are sorted, in descending order
+    if m.size > num_peaks:
+        brightest = np.argpartition(m, -num_peaks)[-num_peaks:]
+        idx = brightest[m[brightest].argsort()[::-1]]
+    else:
+        idx = m.argsort()[::-1]
+    return x[idx], y[idx]
+
+def _coarse_to_fine_maxima(image, gaussian_width, num_peaks, downsample):
+    """
+    Locations of the ``num_peaks`` brightest local maxima of the smoothed image, in
+    descending order of brightness. Candidate maxima are found on the binned, logarithmic
+    image, and refined at full resolution in a small window around each candidate.
+    """
+    b = int(downsample)
+    nx, ny = (image.shape[0]//b)*b, (image.shape[1]//b)*b
+    binned = image[:nx,:ny].reshape(nx//b, b, ny//b, b).sum(axis = (1, 3))
+    # Twice as many candidates are refined, in case the binning merges or reorders peaks
+    coarse_x, coarse_y = _brightest_maxima(np.log1p(binned), max(gaussian_width/b, 1), 2*num_peaks)
+
+    # Within this margin, the gaussian filter of a window is the same as the
+    # gaussian filter of the complete image (see scipy.ndimage.gaussian_filter)
+    margin = b + int(4*gaussian_width + 0.5)
+    candidates = dict()
+    for xc, yc in zip(coarse_x*b + b//2, coarse_y*b + b//2):
+        x0, y0 = max(xc - margin, 0), max(yc - margin, 0)
+        F = gaussian_filter(image[x0:xc + margin + 1, y0:yc + margin + 1], gaussian_width)
+
+        # The peak lies in the bin of the candidate, or in its neighbors
+        i0, j0 = max(xc - b - x0, 0), max(yc - b - y0, 0)
+        inner = F[i0:xc + b + 1 - x0, j0:yc + b + 1 - y0]
+        i, j = np.unravel_index(np.argmax(inner), inner.shape)
+        i, j = i + i0, j + j0
+
+        # Sub-pixel centroid of the 3 x 3 neighborhood of the maximum, rounded to the 
+        # nearest pixel since spectral peaks are integer shifts of the spectrum
+        i_lo, i_hi = max(i - 1, 0), min(i + 2, F.shape[0])
+        j_lo, j_hi = max(j - 1, 0), min(j + 2, F.shape[1])
+        neighborhood = F[i_lo:i_hi, j_lo:j_hi]
+        u, v = np.mgrid[i_lo:i_hi, j_lo:j_hi]
+        weights = neighborhood - neighborhood.min()
+        if weights.sum() > 0:
+            i = int(np.rint(np.sum(u*weights)/weights.sum()))
+            j = int(np.rint(np.sum(v*weights)/weights.sum()))
+        candidates[(x0 + i, y0 + j)] = F[i, j]
+
+    locations = sorted(candidates, key = candidates.get, reverse = True)[:num_peaks]
+    x, y = np.array(locations, dtype = int).reshape((-1, 2)).T
+    return x, y
+
+def _is_raw_image(image):
+    """
+    Determine whether ``image`` holds raw camera counts, i.e. integers.
+    """
+    return np.issubdtype(image.dtype, np.integer)
+
 def _crop_image(image, crop_fraction):
     """
     Crop an image by a factor of ``crop_fraction``.
@@ -194,16 +328,16 @@ def _crop_image(image, crop_fraction):
     if crop_fraction == 0:
         return image
 
-    crop_length = int(image.shape[0] * crop_fraction)
+    crop_lengths = [int(length * crop_fraction) for length in image.shape[:2]]
 
-    if crop_length not in TWO_TO_N:
-        message = ("Final dimensions after crop should be a power of 2^N. "
-                   "Crop fraction of {0} yields dimensions ({1}, {1})"
-                   .format(crop_fraction, crop_length))
+    if any(next_fast_length(length) != length for length in crop_lengths):
+        message = ("Final dimensions after crop should only have prime factors 2, 3, 5 and 7. "
+                   "Crop fraction of {0} yields dimensions ({1}, {2})"
+                   .format(crop_fraction, *crop_lengths))
         warnings.warn(message, CropEfficiencyWarning)
 
-    cropped_image = image[crop_length//2:crop_length//2 + crop_length,
-                          crop_length//2:crop_length//2 + crop_length]
+    cropped_image = image[crop_lengths[0]//2:crop_lengths[0]//2 + crop_lengths[0],
+                          crop_lengths[1]//2:crop_lengths[1]//2 + crop_lengths[1]]
     return cropped_image
 
 def _crop_to_square(image):
@@ -218,6 +352,31 @@ def _crop_to_square(image):
 
     return square_image
 
+def _pad_to_fast_length(image):
+    """
+    Pad an image with its mean value, symmetrically, up to dimensions that only
+    have prime factors 2, 3, 5 and 7.
+
+    Returns
+    -------
+    padded : `~numpy.ndarray`
+    padding : tuple
+        Number of values padded before and after each axis, as in `~numpy.pad`.
+    """
+    padding = list()
+    for length in image.shape:
+        extra = next_fast_length(length) - length
+        padding.append((extra//2, extra - extra//2))
+    padding = tuple(padding)
+
+    if not any(before or after for before, after in padding):
+        return image, padding
+    
+    # Padding with the mean value is equivalent to zero-padding the hologram 
+    # without its DC component, which is masked out during reconstruction anyway
+    padded = np.pad(image, padding, mode = 'constant', constant_values = image.mean())
+    return padded, padding
+
 
 class CropEfficiencyWarning(AstropyUserWarning):
     pass
@@ -231,12 +390,665 @@ class UpdateError(Exception):
 class SizeError(Exception):
     pass
 
+def _default_mask_radius(rebin_factor=1, crop_fraction=None):
+    """
+    Radius [pixels] of the real-image mask in Fourier space.
+    """
+    # TODO: Update 150 to an automated guess based on input values.
+    if rebin_factor != 1:
+        return 150./rebin_factor
+    elif crop_fraction is not None and crop_fraction != 0:
+        return 150.*crop_fraction
+    return 150.
+
+class ArrayCache(object):
+    """
+    Thread-safe, least-recently used cache of read-only arrays, bounded in size.
+
+    A single ArrayCache is shared by all reconstruction plans (see `get_array_cache`), so that 
+    apodization windows, coordinate grids and transfer functions are computed only once for 
+    all holograms of the same geometry, e.g. when the same propagation distances are 
+    reconstructed repeatedly.
+
+    Parameters
+    ----------
+    max_bytes : int or str, optional
+        Maximum total size of the cached arrays, in bytes or as a string such as ``'1GB'``.
+        Least-recently used arrays are discarded first.
+
+    Attributes
+    ----------
+    hits : int
+        Number of lookups for which the array was already cached.
+    misses : int
+        Number of lookups for which the array had to be computed.
+    """
+    def __init__(self, max_bytes=ARRAY_CACHE_SIZE):
+        self.max_bytes = _parse_memory(max_bytes)
+        self.hits = 0
+        self.misses = 0
+        self.nbytes = 0
+        self._arrays = OrderedDict()
+        self._lock = threading.RLock()
+
+    def __repr__(self):
+        return '<ArrayCache: {} arrays, {} of {} bytes, {} hits, {} misses>'.format(
+            len(self), self.nbytes, self.max_bytes, self.hits, self.misses)
+
+    def __len__(self):
+        return len(self._arrays)
+
+    def __contains__(self, key):
+        return key in self._arrays
+
+    def get(self, key, factory):
+        """
+        Cached array associated with ``key``. If the array is not cached, it is 
+        computed by ``factory()`` and inserted into the cache.
+
+        Parameters
+        ----------
+        key : hashable
+            Key identifying the array, e.g. a tuple of the parameters of ``factory``.
+        factory : callable
+            Callable without arguments that returns the array.
+
+        Returns
+        -------
+        array : `~numpy.ndarray`
+            Read-only array, shared with all other users of the cache.
+        """
+        with self._lock:
+            if key in self._arrays:
+                self.hits += 1
+                self._arrays[key] = self._arrays.pop(key)   # Mark as most-recently used
+                return self._arrays[key]
+            self.misses += 1
+
+        # Other threads can use the cache while the array is computed
+        array = factory()
+        array.flags.writeable = False
+        with self._lock:
+            if key not in self._arrays:
+                self._arrays[key] = array
+                self.nbytes += array.nbytes
+                self._evict()
+            return self._arrays[key]
+
+    def resize(self, max_bytes):
+        """
+        Change the maximum total size of the cached arrays.
+
+        Parameters
+        ----------
+        max_bytes : int or str
+            Maximum total size in bytes, or as a string such as ``'1GB'``.
+        """
+        with self._lock:
+            self.max_bytes = _parse_memory(max_bytes)
+            self._evict()
+
+    def clear(self):
+        """ Discard all cached arrays and reset the hit and miss counters. """
+        with self._lock:
+            self._arrays.clear()
+            self.nbytes = self.hits = self.misses = 0
+
+    def _evict(self):
+        """ Discard least-recently used arrays until the cache fits in ``max_bytes``. """
+        while self.nbytes > self.max_bytes and self._arrays:
+            _, array = self._arrays.popitem(last = False)
+            self.nbytes -= array.nbytes
+
+_array_cache = ArrayCache()
+
+def get_array_cache():
+    """
+    Cache of apodization windows, coordinate grids and transfer functions 
+    shared by all reconstruction plans.
+
+    Returns
+    -------
+    cache : ArrayCache
+    """
+    return _array_cache
+
+class ReconstructionPlan(object):
+    """
+    Geometry-dependent quantities shared by all holograms recorded with the
+    same camera and optical setup.
+
+    Similarly to an FFTW plan, a ReconstructionPlan is created once (e.g. for an
+    entire acquisition run) and passed to `~shampoo.Hologram.reconstruct` or
+    `~shampoo.TimeSeries.batch_reconstruct`. Real-image masks are then computed only 
+    once, instead of once per hologram. Coordinate grids, apodization windows and 
+    transfer functions are shared by all plans of the same geometry through the
+    `~shampoo.ArrayCache` returned by `~shampoo.get_array_cache`.
+    """
+    def __init__(self, n, wavelength=405e-9, dx=3.45e-6, dy=3.45e-6,
+                 mask_radius=150., max_cached=8, precision='double'):
+        """
+        Parameters
+        ----------
+        n : int or tuple of ints
+            Side length [pixels] of square holograms, or dimensions (X, Y) of rectangular 
+            holograms, after cropping, binning and padding.
+        wavelength : float [meters] or iterable
+            Wavelength of laser. Multiple wavelengths can be given as well.
+        dx : float [meters]
+            Pixel width in x-direction (binned)
+        dy : float [meters]
+            Pixel width in y-direction (binned)
+        mask_radius : float
+            Radial width [pixels] of the real-image mask in Fourier space.
+        max_cached : int, optional
+            Maximum number of real-image masks kept in memory.
+            Least-recently used arrays are discarded first. Default is 8.
+        precision : {'double', 'single'}, optional
+            Floating-point precision of apodization windows and transfer functions.
+        """
+        self.shape = tuple(int(length) for length in np.broadcast_to(n, (2,)))
+        self.n = self.shape[0]
+        self.wavelength = np.atleast_1d(wavelength).reshape((1,1,-1))
+        self.wavenumber = 2*np.pi/self.wavelength
+        self.dx = dx
+        self.dy = dy
+        self.mask_radius = mask_radius
+        self.max_cached = int(max_cached)
+        self.precision = precision
+        self.real_dtype, self.complex_dtype = _precision_dtypes(precision)
+
+        self._phase_mask_basis = None
+        self._masks = OrderedDict()
+
+    @classmethod
+    def from_hologram(cls, hologram, **kwargs):
+        """
+        Create a plan matching the geometry of a hologram. Keyword arguments
+        are passed to the ReconstructionPlan constructor.
+
+        Parameters
+        ----------
+        hologram : Hologram
+        """
+        kwargs.setdefault('mask_radius', _default_mask_radius(hologram.rebin_factor,
+                                                              hologram.crop_fraction))
+        return cls(n = hologram.hologram.shape, wavelength = hologram.wavelength,
+                   dx = hologram.dx, dy = hologram.dy, precision = hologram.precision, **kwargs)
+
+    @property
+    def ogrid(self):
+        """ Open pixel coordinates ``(x, y)`` of shapes (X, 1) and (1, Y), see `~numpy.ogrid` """
+        nx, ny = self.shape
+        x = get_array_cache().get(('coordinates', nx, 0), lambda: np.arange(nx)[:,None])
+        y = get_array_cache().get(('coordinates', ny, 1), lambda: np.arange(ny)[None,:])
+        return x, y
+
+    @property
+    def mgrid(self):
+        """ Pixel coordinates ``(x, y)`` as read-only views of shape (X, Y), broadcast from `ogrid` """
+        return tuple(np.broadcast_arrays(*self.ogrid))
+
+    @property
+    def phase_mask_basis(self):
+        """ Polynomial basis of shape (6, X) on which the digital phase mask is fitted """
+        if self._phase_mask_basis is None:
+            t = np.arange(self.shape[0]) - self.shape[0]/2
+            self._phase_mask_basis = np.array([np.ones_like(t), t, t, t**2, t * t, t**2])
+            self._phase_mask_basis.flags.writeable = False
+        return self._phase_mask_basis
+
+    def is_compatible(self, hologram):
+        """
+        Returns True if this plan can be used to reconstruct ``hologram``.
+
+        Parameters
+        ----------
+        hologram : Hologram
+        """
+        return (self.shape == hologram.hologram.shape and
+                self.precision == hologram.precision and
+                self.wavelength.shape == hologram.wavelength.shape and
+                np.allclose(self.wavelength, hologram.wavelength) and
+                np.allclose([self.dx, self.dy], [hologram.dx, hologram.dy]))
+
+    def apodization_window(self, alpha=0.075):
+        """
+        Two-dimensional Tukey window of shape (X, Y, 1).
+
+        Parameters
+        ----------
+        alpha : float between zero and one
+            Alpha parameter for the Tukey window function.
+        """
+        def window():
+            window = tukey(self.shape[0], alpha)[:, np.newaxis] * tukey(self.shape[1], alpha)
+            return np.atleast_3d(window).astype(self.real_dtype)
+        
+        key = ('apodization', self.shape, float(alpha), self.precision)
+        return get_array_cache().get(key, window)
+
+    def real_image_mask(self, center_x, center_y, radius=None):
+        """
+        Calculate the Fourier-space mask to isolate the real image. Masks are
+        cached based on the position of the spectral peak.
+
+        Parameters
+        ----------
+        center_x : `~numpy.ndarray`
+            ``x`` centroid [pixels] of real image in Fourier space for each
+            image in a stack.
+        center_y : `~numpy.ndarray`
+            ``y`` centroid [pixels] of real image in Fourier space for each
+            image in a stack.
+        radius : float or None, optional
+            Radial width of mask [pixels]. Default is ``self.mask_radius``.
+
+        Returns
+        -------
+        mask : `~numpy.ndarray`
+            Binary-valued mask centered on the real-image peak in the Fourier
+            transform of the hologram.
+        """
+        if radius is None:
+            radius = self.mask_radius
+        center_x, center_y = np.reshape(center_x, (1, 1, -1)), np.reshape(center_y, (1, 1, -1))
+
+        key = (tuple(center_x.ravel()), tuple(center_y.ravel()), float(radius))
+        if key in self._masks:
+            self._masks[key] = self._masks.pop(key)     # Mark as most-recently used
+            return self._masks[key]
+
+        x, y = self.ogrid
+        x, y = x[:,:,None], y[:,:,None]
+        x_shift = x-center_x
+        y_shift = y-center_y
+        mask = (x_shift)**2 + (y_shift)**2 < radius**2
+
+        return self._cache(self._masks, key, mask)
+
+    def fourier_trans_of_impulse_resp_func(self, propagation_distance):
+        """
+        Calculate the Fourier transform of impulse response function, sometimes
+        represented as ``G`` in the literature. See
+        `~shampoo.Hologram.fourier_trans_of_impulse_resp_func`.
+
+        Parameters
+        ----------
+        propagation_distance : float or `~numpy.ndarray`
+            Propagation distance [m]
+
+        Returns
+        -------
+        G : `~numpy.ndarray`
+            Fourier transform of impulse response function
+        """
+        nx, ny = self.shape
+        x, y = self.ogrid
+        x, y = np.atleast_3d(x - nx/2), np.atleast_3d(y - ny/2)
+        propagation_distance = np.atleast_3d(propagation_distance)
+        first_term = (self.wavelength**2 * (x + nx**2 * self.dx**2 /
+                      (2.0 * propagation_distance * self.wavelength))**2 /
+                      (nx**2 * self.dx**2))
+        second_term = (self.wavelength**2 * (y + ny**2 * self.dy**2 /
+                       (2.0 * propagation_distance * self.wavelength))**2 /
+                       (ny**2 * self.dy**2))
+        G = np.exp(-1j * self.wavenumber * propagation_distance *
+                   np.sqrt(1.0 - first_term - second_term))
+        return G.astype(self.complex_dtype, copy = False)
+
+    @property
+    def wavevector_z(self):
+        """ 
+        Axial wavevector [rad/m] of each spatial frequency of the centered spectrum, 
+        of shape (X, Y, wavelengths). Evanescent frequencies are set to zero.
+        """
+        def wavevector_z():
+            nx, ny = self.shape
+            x, y = self.ogrid
+            fx = np.atleast_3d(x - nx/2) / (nx * self.dx)
+            fy = np.atleast_3d(y - ny/2) / (ny * self.dy)
+            return 2*np.pi*np.sqrt(np.maximum(self.wavelength**-2 - fx**2 - fy**2, 0))
+
+        key = ('wavevector_z', self.shape, self.dx, self.dy, tuple(self.wavelength.ravel()))
+        return get_array_cache().get(key, wavevector_z)
+
+    def angular_spectrum(self, propagation_distance):
+        """
+        Angular-spectrum transfer function ``exp(-i d kz)`` of the centered spectrum.
+        Contrary to `~shampoo.ReconstructionPlan.fourier_trans_of_impulse_resp_func`, 
+        it satisfies ``G(d + delta) = G(d) * exp(-i delta kz)``, which allows for 
+        incremental stepping through evenly-spaced propagation distances.
+
+        Like `~shampoo.ReconstructionPlan.fourier_trans_of_impulse_resp_func`, it includes 
+        the phase ramp ``exp(i pi (x + y))`` of centered frequencies ``(x, y)``, which shifts 
+        the reconstructed wave by half the field of view.
+
+        Parameters
+        ----------
+        propagation_distance : float or `~numpy.ndarray`
+            Propagation distance [m]
+
+        Returns
+        -------
+        G : `~numpy.ndarray`
+            Angular-spectrum transfer function, of shape (X, Y, wavelengths).
+        """
+        nx, ny = self.shape
+        x, y = self.ogrid
+        half_field = np.pi * np.atleast_3d((x - nx/2) + (y - ny/2))
+        propagation_distance = np.atleast_3d(propagation_distance)
+        G = np.exp(-1j * (propagation_distance * self.wavevector_z - half_field))
+        return G.astype(self.complex_dtype, copy = False)
+
+    def transfer_function(self, propagation_distance, chromatic_shift=None, propagation='direct'):
+        """
+        Cached Fourier transform of the impulse response function at a single
+        propagation distance, for all wavelengths.
+
+        Parameters
+        ----------
+        propagation_distance : float
+            Propagation distance [m]
+        chromatic_shift : `~numpy.ndarray` or None, optional
+            Change in depth of focus for each wavelength [m].
+        propagation : {'direct', 'incremental'}, optional
+            If 'direct' (default), the transfer function is given by 
+            `~shampoo.ReconstructionPlan.fourier_trans_of_impulse_resp_func`. If 'incremental', 
+            the angular-spectrum transfer function is used instead.
+
+        Returns
+        -------
+        G : `~numpy.ndarray`, ndim 3
+            Array of shape (X, Y, wavelengths).
+        """
+        if propagation not in PROPAGATION_MODES:
+            raise ValueError('Propagation mode {} is not one of {}'.format(propagation, PROPAGATION_MODES))
+
+        chromatic_shift = self._chromatic_shift(chromatic_shift)
+        propagation_distance = float(np.squeeze(propagation_distance))
+
+        def transfer_function():
+            distances = np.full_like(self.wavelength, propagation_distance) - chromatic_shift
+            if propagation == 'incremental':
+                return self.angular_spectrum(distances)
+            return self.fourier_trans_of_impulse_resp_func(distances)
+
+        key = ('transfer_function', self.shape, self.dx, self.dy, tuple(self.wavelength.ravel()), 
+               propagation_distance, tuple(chromatic_shift.ravel()), propagation, self.precision)
+        return get_array_cache().get(key, transfer_function)
+
+    def transfer_functions(self, propagation_distances, chromatic_shift=None, propagation='direct',
+                           reseed_interval=RESEED_INTERVAL):
+        """
+        Generator of the transfer functions at each of ``propagation_distances``.
+
+        In 'incremental' mode, propagation distances must be evenly spaced: after the first
+        distance, each transfer function is obtained from the previous one with a single 
+        complex multiplication. The transfer function is evaluated from scratch every 
+        ``reseed_interval`` distances to bound the accumulation of round-off errors.
+        Yielded arrays are then overwritten by the following iteration, and should not be kept.
+
+        Parameters
+        ----------
+        propagation_distances : iterable of float
+            Propagation distances [m]
+        chromatic_shift : `~numpy.ndarray` or None, optional
+            Change in depth of focus for each wavelength [m].
+        propagation : {'direct', 'incremental'}, optional
+            Propagation mode. See `~shampoo.ReconstructionPlan.transfer_function`.
+        reseed_interval : int, optional
+            Number of incremental steps between exact evaluations of the transfer function.
+
+        Yields
+        ------
+        G : `~numpy.ndarray`, ndim 3
+            Array of shape (X, Y, wavelengths).
+
+        Raises
+        ------
+        ValueError
+            If propagation distances are not evenly spaced in 'incremental' mode.
+        """
+        propagation_distances = np.atleast_1d(propagation_distances).astype(float)
+        if propagation != 'incremental' or len(propagation_distances) < 3:
+            for distance in propagation_distances:
+                yield self.transfer_function(distance, chromatic_shift, propagation = propagation)
+            return
+
+        steps = np.diff(propagation_distances)
+        step = (propagation_distances[-1] - propagation_distances[0])/(len(propagation_distances) - 1)
+        if not np.allclose(steps, step, rtol = 1e-6, atol = 0):
+            raise ValueError('Incremental propagation requires evenly-spaced propagation distances.')
+
+        chromatic_shift = self._chromatic_shift(chromatic_shift)
+        step_function = np.exp(-1j * step * self.wavevector_z).astype(self.complex_dtype)
+        for index, distance in enumerate(propagation_distances):
+            if index % max(1, int(reseed_interval)) == 0:
+                G = self.angular_spectrum(distance - chromatic_shift)
+            else:
+                G *= step_function
+            yield G
+
+    def depth_chunks(self, num_depths, max_memory):
+        """
+        Plan the reconstruction of ``num_depths`` propagation distances within
+        a memory budget. The budget includes the `~shampoo.ArrayCache` shared by all
+        plans, counted at its maximum size: for budgets of a few times this size or less, 
+        reduce the cache with ``get_array_cache().resize()``.
+
+        Parameters
+        ----------
+        num_depths : int
+            Number of propagation distances.
+        max_memory : int or str
+            Memory budget in bytes, or as a string such as ``'8GB'``.
+
+        Returns
+        -------
+        chunk_size : int
+            Number of propagation distances reconstructed together.
+        in_memory : bool
+            Whether the complete reconstructed wave fits in memory. If False, the reconstructed
+            wave should be written to disk as it is computed.
+
+        Raises
+        ------
+        MemoryError
+            If a single propagation distance cannot be reconstructed within ``max_memory``.
+        """
+        budget = _parse_memory(max_memory)
+        mask_bytes = np.prod(self.shape) * self.wavelength.size
+        slice_bytes = mask_bytes * np.dtype(self.complex_dtype).itemsize
+
+        # The shared cache of transfer functions, windows and coordinates, the masks cached
+        # by this plan, plus the hologram spectrum, digital phase mask and the intermediate 
+        # arrays of the digital phase mask fit
+        fixed = get_array_cache().max_bytes + self.max_cached * mask_bytes + 6 * slice_bytes
+        available = budget - fixed
+
+        # Every propagation distance of a chunk requires a product buffer, the output
+        # of the inverse transform and the reconstructed wave itself
+        if available < 3 * slice_bytes:
+            raise MemoryError('{} bytes of memory are insufficient for reconstructions of dimensions '
+                              '{}. At least {} bytes are required.'.format(budget, 
+                                                    self.shape + (self.wavelength.size,), 
+                                                    fixed + 3 * slice_bytes))
+        
+        chunk_size = int(min(DEPTH_CHUNK_SIZE, num_depths))
+        in_memory = available >= (num_depths + 2 * chunk_size) * slice_bytes
+        if in_memory:
+            return chunk_size, True
+        return int(max(1, min(chunk_size, available // (3 * slice_bytes)))), False
+
+    def _chromatic_shift(self, chromatic_shift=None):
+        """ Chromatic shift of shape (1, 1, wavelengths) """
+        if chromatic_shift is None:
+            return np.zeros_like(self.wavelength)
+        return np.atleast_1d(chromatic_shift).reshape((1,1,-1))
+
+    def _cache(self, cache, key, value):
+        """ Insert ``value`` into a least-recently used ``cache``. """
+        value.flags.writeable = False   # Cached arrays are shared between holograms
+        cache[key] = value
+        while len(cache) > self.max_cached:
+            cache.popitem(last = False)
+        return value
+
+class Calibration(object):
+    """
+    Instrument-dependent reconstruction parameters, i.e. the position of the spectral peak,
+    the Fourier mask and the chromatic shift. For a fixed optical setup, the carrier frequency
+    of holograms does not move: a Calibration is determined once (e.g. on the first hologram
+    of an acquisition run) and applied to all other holograms, which avoids a search of the
+    spectral peak over the full power spectrum of every hologram.
+    """
+    def __init__(self, spectral_peak, chromatic_shift=None, fourier_mask=None):
+        """
+        Parameters
+        ----------
+        spectral_peak : `~numpy.ndarray`
+            Centroid of spectral peak for wavelength in power spectrum of hologram FT
+            (len(wavelength) x 2)
+        chromatic_shift : iterable or None, optional
+            Change in depth of focus for each wavelength, in meters.
+        fourier_mask : array_like or None, optional
+            Fourier-domain mask. If None (default), the mask is determined from the 
+            position of the spectral peak.
+        """
+        self.spectral_peak = np.rint(np.atleast_2d(spectral_peak)).astype(int)
+        self.chromatic_shift = chromatic_shift
+        if chromatic_shift is not None:
+            self.chromatic_shift = np.atleast_1d(chromatic_shift).reshape(-1)
+        self.fourier_mask = fourier_mask
+        if fourier_mask is not None:
+            self.fourier_mask = np.asarray(fourier_mask, dtype = bool)
+
+    @classmethod
+    def from_hologram(cls, hologram, fourier_mask=None):
+        """
+        Calibrate on a hologram. The spectral peak is searched over the full power 
+        spectrum of the hologram, unless it has been specified already.
+
+        Parameters
+        ----------
+        hologram : Hologram
+        fourier_mask : array_like or None, optional
+            Fourier-domain mask. If None (default), the mask is determined from the 
+            position of the spectral peak.
+        """
+        return cls(spectral_peak = hologram.spectral_peak.swapaxes(0,1), 
+                   chromatic_shift = hologram.chromatic_shift, fourier_mask = fourier_mask)
+
+    def apply(self, hologram):
+        """
+        Set the spectral peak and chromatic shift of ``hologram``.
+
+        Parameters
+        ----------
+        hologram : Hologram
+
+        Raises
+        ------
+        UpdateError
+            If the calibration does not have as many channels as the hologram has wavelengths.
+        """
+        hologram.update_spectral_peak(self.spectral_peak)
+        if self.chromatic_shift is not None:
+            hologram.update_chromatic_shift(self.chromatic_shift)
+
+    def drift(self, hologram, window=DRIFT_WINDOW, gaussian_width=2):
+        """
+        Displacement of the spectral peak of ``hologram`` with respect to the calibrated 
+        position. Only a square window of the power spectrum around the calibrated spectral 
+        peak is evaluated, instead of the full power spectrum.
+
+        Parameters
+        ----------
+        hologram : Hologram
+        window : int, optional
+            Half-width [pixels] of the searched window. Default is 16.
+        gaussian_width : float, optional
+            Width [pixels] of the gaussian filter applied to the window before the search.
+
+        Returns
+        -------
+        drift : `~numpy.ndarray`
+            Displacement [pixels] of the spectral peak for each wavelength (len(wavelength) x 2).
+            Displacements as large as ``window`` indicate that the peak may lie outside of the window.
+        """
+        nx, ny = hologram.hologram.shape
+        offsets = np.arange(-window, window + 1)
+
+        drift = np.zeros_like(self.spectral_peak)
+        for channel, (x_peak, y_peak) in enumerate(self.spectral_peak):
+            # Undo the centering of the spectrum, see fftshift
+            rows = (x_peak + offsets - nx//2) % nx
+            columns = (y_peak + offsets - ny//2) % ny
+            values = np.abs(hermitian_values(hologram.rft_hologram, ny, 
+                                             rows[:,None], columns[None,:]))
+            values = gaussian_filter(values, gaussian_width)
+            x, y = np.unravel_index(np.argmax(values), values.shape)
+            drift[channel] = offsets[x], offsets[y]
+        return drift
+
+class Workspace(object):
+    """
+    Scratch arrays reused between reconstructions, e.g. by a long-running process that 
+    reconstructs holograms of the same dimensions one after the other::
+
+        workspace = Workspace()
+        for hologram in holograms:
+            wave = hologram.reconstruct(distances, out = cube, workspace = workspace)
+
+    Arrays are allocated on first use, and reallocated only if their dimensions or data type 
+    change. A Workspace should not be shared between threads.
+    """
+    def __init__(self):
+        self._buffers = dict()
+
+    def __repr__(self):
+        return '<Workspace: {} arrays, {} bytes>'.format(len(self._buffers), self.nbytes)
+
+    @property
+    def nbytes(self):
+        """ Total size of the scratch arrays, in bytes """
+        return sum(buffer.nbytes for buffer in self._buffers.values())
+
+    def buffer(self, name, shape, dtype):
+        """
+        Scratch array ``name``. Its content is undefined.
+
+        Parameters
+        ----------
+        name : str
+            Name of the array.
+        shape : tuple of ints
+            Dimensions of the array.
+        dtype : `~numpy.dtype`
+            Data type of the array.
+
+        Returns
+        -------
+        buffer : `~numpy.ndarray`
+        """
+        shape, dtype = tuple(shape), np.dtype(dtype)
+        buffer = self._buffers.get(name)
+        if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+            buffer = self._buffers[name] = np.empty(shape, dtype = dtype)
+        return buffer
+
+    def clear(self):
+        """ Release all scratch arrays. """
+        self._buffers.clear()
+
 class Hologram(object):
     """
     Container for holograms and methods to reconstruct them.
     """
     def __init__(self, hologram, crop_fraction=None, wavelength=405e-9,
-                 rebin_factor=1, dx=3.45e-6, dy=3.45e-6):
+                 rebin_factor=1, dx=3.45e-6, dy=3.45e-6, precision='double',
+                 crop_to_square=True, pad=False, unwrap_method='skimage'):
         """
         Parameters
         ----------
@@ -253,24 +1065,43 @@ class Hologram(object):
             Pixel width in x-direction (unbinned)
         dy : float [meters]
             Pixel width in y-direction (unbinned)
-
-        Notes
-        -----
-        Non-square holograms will be cropped to a square with the dimensions of
-        the smallest dimension. TODO: Why are we not zero-filling out to the next
-        power of 2 instead of cropping?
+        precision : {'double', 'single'}, optional
+            Floating-point precision of the reconstruction. Integer holograms (e.g. uint8 or uint16
+            camera images) are kept in their native dtype if they are not rebinned or padded; 
+            floating-point holograms are converted to this precision. In 'single' precision, 
+            reconstructed waves are complex64 arrays, which halves memory usage.
+            Default is 'double'.
+        crop_to_square : bool, optional
+            If True (default), non-square holograms are cropped to a square with the dimensions 
+            of the smallest dimension. If False, rectangular holograms are reconstructed 
+            with their full field of view.
+        pad : bool, optional
+            If True, the hologram is padded symmetrically, with its mean value, up to dimensions 
+            which only have prime factors 2, 3, 5 and 7 (e.g. 2448 x 2050 becomes 2450 x 2058), 
+            for which Fourier transforms are fastest. Reconstructed waves then have the padded 
+            dimensions; see the ``padding`` attribute. Default is False.
+        unwrap_method : {'skimage', 'dct'}, optional
+            Phase unwrapping algorithm used to fit the digital phase mask, and to compute the 
+            phase of reconstructed waves. See `~shampoo.unwrap_phase`. Default is 'skimage'.
         """
         wavelength = np.atleast_1d(wavelength).reshape((1,1,-1))
 
         self.crop_fraction = crop_fraction
         self.rebin_factor = rebin_factor
+        self.precision = precision
+        self.real_dtype, self.complex_dtype = _precision_dtypes(precision)
 
-        hologram = np.asarray(hologram, dtype = np.float)
+        hologram = np.asarray(hologram)
         if hologram.ndim != 2:
             raise ValueError('hologram dimensions ({}) are invalid. Holograms should be 2D image'.format(hologram.shape))
+        # Raw camera images are kept in their native integer dtype, unless they have to be
+        # resampled. Conversion to floating-point happens during apodization.
+        if not (_is_raw_image(hologram) and rebin_factor == 1 and not pad):
+            hologram = hologram.astype(self.real_dtype, copy = False)
         # Rebin the hologram
-        square_hologram = _crop_to_square(hologram)
-        binned_hologram = rebin_image(square_hologram, self.rebin_factor)
+        if crop_to_square:
+            hologram = _crop_to_square(hologram)
+        binned_hologram = rebin_image(hologram, self.rebin_factor)
 
         # Crop the hologram by factor crop_factor, centered on original center
         if crop_fraction is not None:
@@ -278,6 +1109,10 @@ class Hologram(object):
         else:
             self.hologram = binned_hologram
         
+        self.padding = ((0, 0), (0, 0))
+        if pad:
+            self.hologram, self.padding = _pad_to_fast_length(self.hologram)
+        
         self.n = self.hologram.shape[0]
         self.wavelength = wavelength
         self.wavenumber = 2*np.pi/self.wavelength
@@ -285,10 +1120,39 @@ class Hologram(object):
         self._chromatic_shift = None
         self.dx = dx*rebin_factor
         self.dy = dy*rebin_factor
-        self.mgrid = np.mgrid[0:self.n, 0:self.n]
         self.random_seed = RANDOM_SEED
-        self.apodization_window_function = None
+        if unwrap_method not in UNWRAP_METHODS:
+            raise ValueError('Unwrapping method {} is not one of {}'.format(unwrap_method, UNWRAP_METHODS))
+        self.unwrap_method = unwrap_method
+        self._plan = None
+        self._phase_mask_coefficients = None
         self._ft_hologram = None;
+        self._rft_hologram = None
+
+    @property
+    def plan(self):
+        """
+        `~shampoo.ReconstructionPlan` holding the geometry-dependent arrays
+        used for reconstruction. If no plan has been specified, one is
+        created on first access.
+        """
+        if self._plan is None:
+            self._plan = ReconstructionPlan.from_hologram(self)
+        return self._plan
+
+    @plan.setter
+    def plan(self, plan):
+        if plan.shape != self.hologram.shape:
+            raise SizeError('Plan dimensions {} do not match hologram dimensions {}'.format(plan.shape, 
+                                                                                         self.hologram.shape))
+        if not plan.is_compatible(self):
+            raise ValueError('Plan wavelengths or pixel sizes do not match the hologram.')
+        self._plan = plan
+
+    @property
+    def mgrid(self):
+        """ Pixel coordinates ``(x, y)``, see `~shampoo.ReconstructionPlan.mgrid` """
+        return self.plan.mgrid
         
     @property
     def ft_hologram(self, apodize=True):
@@ -296,14 +1160,21 @@ class Hologram(object):
         `~numpy.ndarray` of the self.hologram FFT
         """
         if self._ft_hologram is None:
-            if apodize==True:
-                apodized_hologram = self.apodize(self.hologram)
-                self._ft_hologram = fftshift(fft2(apodized_hologram))
-            else:
-                self._ft_hologram = fftshift(fft2(self.hologram))
+            self._ft_hologram = fftshift(hermitian_completion(self.rft_hologram, self.hologram.shape[1]))
 
         return self._ft_hologram
-        
+
+    @property
+    def rft_hologram(self):
+        """
+        `~numpy.ndarray` of the non-negative frequencies (along axis 1) of the apodized 
+        hologram FFT, which is real-valued. See `~numpy.fft.rfft2`.
+        """
+        if self._rft_hologram is None:
+            self._rft_hologram = rfft2(self.apodize(self.hologram), axes = (0, 1))
+            self._rft_hologram = self._rft_hologram.astype(self.complex_dtype, copy = False)
+        return self._rft_hologram
+
     @property
     def spectral_peak(self):
         if self._spectral_peak is None:
@@ -312,6 +1183,16 @@ class Hologram(object):
         
         return self._spectral_peak
         
+    @property
+    def phase_mask_coefficients(self):
+        """
+        Polynomial coefficients of the digital phase mask shared by all propagation
+        distances, of dimensions (6, Y, wavelengths), or None if the digital phase
+        mask is fitted at every propagation distance. These are stored by 
+        `~shampoo.Hologram.fit_phase_mask` and `~shampoo.Hologram.update_phase_mask_coefficients`.
+        """
+        return self._phase_mask_coefficients
+
     @property
     def chromatic_shift(self):
         if self._chromatic_shift is None:
@@ -325,7 +1206,8 @@ class Hologram(object):
         Load a hologram from a TIF file.
 
         This class method takes the path to the TIF file as the first argument.
-        All other arguments are the same as `~shampoo.Hologram`.
+        All other arguments are the same as `~shampoo.Hologram`. Multi-page
+        acquisition stacks can be loaded lazily with `~shampoo.HologramStack`.
 
         Parameters
         ----------
@@ -335,7 +1217,10 @@ class Hologram(object):
         hologram = _load_hologram(hologram_path)
         return cls(hologram, **kwargs)
         
-    def reconstruct(self, propagation_distance, spectral_peak=None, fourier_mask=None, chromatic_shift=None):
+    def reconstruct(self, propagation_distance, spectral_peak=None, fourier_mask=None, chromatic_shift=None,
+                    plan=None, depth_sweep=False, phase_mask_coefficients=None, propagation='direct',
+                    reseed_interval=RESEED_INTERVAL, crop_sideband=False, max_memory=None, 
+                    outputs=('wave',), out=None, workspace=None):
         """
         Reconstruct the hologram at all ``propagation_distance`` for all ``self.wavelength``.
         
@@ -349,14 +1234,174 @@ class Hologram(object):
         fourier_mask : array_like or None, optional
             Fourier-domain mask. If None (default), a mask is determined from the position of the
             main spectral peak. If array_like, the array will be cast to boolean.
+        plan : ReconstructionPlan or None, optional
+            Precomputed geometry-dependent arrays, shared between holograms of the same
+            dimensions, wavelengths and pixel sizes. If None (default), the hologram's
+            own plan is used.
+        depth_sweep : bool, optional
+            If True, the digital phase mask is fitted only once, at the central propagation 
+            distance, and the phase-corrected spectrum of the hologram is shared by all 
+            propagation distances. Each propagation distance then costs a single multiplication 
+            and inverse Fourier transform. Default is False, where the digital phase mask 
+            is fitted at every propagation distance. The coefficients fitted for the sweep are 
+            not stored; see `~shampoo.Hologram.fit_phase_mask`.
+        phase_mask_coefficients : `~numpy.ndarray` or None, optional
+            Polynomial coefficients of the digital phase mask, e.g. fitted on another hologram
+            of the same acquisition run with `~shampoo.Hologram.fit_phase_mask`. If provided, 
+            the digital phase mask is not fitted and reconstruction proceeds as with ``depth_sweep``.
+            These coefficients are used for this reconstruction only, and are not stored.
+        propagation : {'direct', 'incremental'}, optional
+            If 'direct' (default), the transfer function is evaluated at every propagation distance.
+            If 'incremental', evenly-spaced propagation distances (e.g. from `~numpy.linspace`) are 
+            stepped through with the angular-spectrum transfer function, at the cost of a single complex 
+            multiplication per propagation distance. Incremental propagation implies ``depth_sweep``.
+        reseed_interval : int, optional
+            In 'incremental' mode, number of propagation distances after which the transfer
+            function is evaluated from scratch, bounding the accumulation of round-off errors.
+        crop_sideband : bool, optional
+            If True, only the bounding box of the masked sideband (e.g. 320 x 320 pixels for 
+            the default mask radius of 150 pixels) is inverse-transformed. The reconstructed wave 
+            is then sampled at the information bandwidth of the sideband, i.e. on a coarser grid 
+            of ``m x m`` pixels of size ``dx * n / m``. Default is False.
+        max_memory : int, str or None, optional
+            Memory budget of the reconstruction in bytes, or as a string such as ``'8GB'``. 
+            Propagation distances are reconstructed in chunks that fit in this budget. If the 
+            complete reconstructed wave does not fit, it is written to a temporary `~numpy.memmap`. 
+            Default is None, where memory usage is not restricted. See 
+            `~shampoo.ReconstructionPlan.depth_chunks`.
+        outputs : iterable of {'wave', 'intensity', 'phase'}, optional
+            Quantities computed during reconstruction. Intensity and phase are computed chunk by 
+            chunk of propagation distances. If 'wave' is not requested, the complex reconstructed 
+            wave is discarded after each chunk, and the ``reconstructed_wave`` attribute of the 
+            returned object is None. Default is ('wave',), where intensity and phase are 
+            computed on demand.
+        out : `~numpy.ndarray` or None, optional
+            Array of dimensions (X, Y, Z, wavelengths) and of the complex data type of the 
+            reconstruction (e.g. complex128 in 'double' precision), in which the reconstructed 
+            wave is written. If None (default), a new array is allocated.
+        workspace : Workspace or None, optional
+            Scratch arrays reused between reconstructions. If None (default), scratch arrays 
+            are allocated for this reconstruction only.
 
         Returns
         -------
         reconstructed : ReconstructedWave
             Container object for the reconstructed wave.
+
+        Raises
+        ------
+        ValueError
+            If ``outputs`` is empty or contains invalid quantities, or if ``out`` is provided
+            but 'wave' is not in ``outputs``, or ``out`` has the wrong dimensions or data type.
+        """
+        outputs = tuple(outputs)
+        if not outputs or any(output not in OUTPUTS for output in outputs):
+            raise ValueError('Outputs {} must be a non-empty combination of {}'.format(outputs, OUTPUTS))
+        if out is not None and 'wave' not in outputs:
+            raise ValueError("An output array can only be provided if 'wave' is in outputs.")
+
+        propagation_distance, fourier_mask, coefficients = self._prepare_reconstruction(
+            propagation_distance, spectral_peak = spectral_peak, fourier_mask = fourier_mask, 
+            chromatic_shift = chromatic_shift, plan = plan, depth_sweep = depth_sweep, 
+            phase_mask_coefficients = phase_mask_coefficients, propagation = propagation)
+        
+        chunk_size, in_memory = DEPTH_CHUNK_SIZE, True
+        if max_memory is not None:
+            chunk_size, in_memory = self.plan.depth_chunks(len(propagation_distance), max_memory)
+
+        if out is not None:
+            shape = self._wave_shape(fourier_mask, crop_sideband) + (len(propagation_distance), 
+                                                                      self.wavelength.size)
+            if out.shape != shape or out.dtype != self.complex_dtype:
+                raise ValueError('Output array of dimensions {} and type {} is incompatible with the reconstructed '
+                                 'wave, of dimensions {} and type {}.'.format(out.shape, out.dtype, shape, 
+                                                                               np.dtype(self.complex_dtype)))
+
+        wave, intensity, phase = self._reconstruct_stack(propagation_distance, fourier_mask = fourier_mask, 
+                                                         chunk_size = chunk_size, propagation = propagation, 
+                                                         reseed_interval = reseed_interval, 
+                                                         crop_sideband = crop_sideband, outputs = outputs,
+                                                         in_memory = in_memory, out = out, 
+                                                         workspace = workspace, 
+                                                         phase_mask_coefficients = coefficients)
+        
+        return ReconstructedWave(reconstructed_wave = wave, fourier_mask = fourier_mask, 
+                                 wavelength = self.wavelength, depths = propagation_distance,
+                                 unwrap_method = self.unwrap_method, intensity = intensity, phase = phase)
+
+    def iter_reconstruct(self, propagation_distance, chunk_size=1, reseed_interval=RESEED_INTERVAL, 
+                         crop_sideband=False, workspace=None, **kwargs):
+        """
+        Reconstruct the hologram at all ``propagation_distance``, one chunk of propagation
+        distances at a time. Contrary to `~shampoo.Hologram.reconstruct`, the complete
+        reconstructed volume is never held in memory, e.g.::
+
+            for wave in hologram.iter_reconstruct(np.linspace(0.09, 0.14, 150)):
+                focus_metric.append(np.var(wave.intensity))
+
+        Parameters
+        ----------
+        propagation_distance : float or iterable of float
+            Propagation distance(s) to reconstruct
+        chunk_size : int, optional
+            Number of propagation distances in each yielded ReconstructedWave. Default is 1.
+        reseed_interval : int, optional
+            See `~shampoo.Hologram.reconstruct`.
+        crop_sideband : bool, optional
+            See `~shampoo.Hologram.reconstruct`.
+        workspace : Workspace or None, optional
+            Scratch arrays reused between chunks and reconstructions. If provided, the
+            reconstructed wave of each yielded object is overwritten by the next chunk, 
+            and should not be kept. If None (default), every chunk is a new array.
+        
+        Other keyword arguments are ``spectral_peak``, ``fourier_mask``, ``chromatic_shift``,
+        ``plan``, ``depth_sweep``, ``phase_mask_coefficients`` and ``propagation``, as in 
+        `~shampoo.Hologram.reconstruct`. Reconstructed waves are yielded rather than stored, 
+        so that ``max_memory``, ``outputs`` and ``out`` are not accepted.
+
+        Yields
+        ------
+        reconstructed : ReconstructedWave
+            Container object for the reconstructed wave at ``chunk_size`` propagation distances,
+            or fewer for the last chunk.
+        """
+        propagation_distance, fourier_mask, coefficients = self._prepare_reconstruction(propagation_distance, 
+                                                                                         **kwargs)
+
+        chunks = self._iter_stack(propagation_distance, fourier_mask = fourier_mask, chunk_size = chunk_size,
+                                  propagation = kwargs.get('propagation', 'direct'), 
+                                  reseed_interval = reseed_interval, crop_sideband = crop_sideband,
+                                  workspace = workspace, phase_mask_coefficients = coefficients)
+        for start, wave in chunks:
+            yield ReconstructedWave(reconstructed_wave = wave, fourier_mask = fourier_mask, 
+                                    wavelength = self.wavelength, 
+                                    depths = propagation_distance[start:start + wave.shape[2]],
+                                    unwrap_method = self.unwrap_method)
+
+    def _prepare_reconstruction(self, propagation_distance, spectral_peak=None, fourier_mask=None, 
+                                chromatic_shift=None, plan=None, depth_sweep=False, 
+                                phase_mask_coefficients=None, propagation='direct'):
+        """
+        Update the reconstruction parameters of the hologram. Parameters are 
+        described in `~shampoo.Hologram.reconstruct`.
+
+        Returns
+        -------
+        propagation_distance : `~numpy.ndarray`, ndim 1
+            Propagation distances.
+        fourier_mask : array_like or None
+            Fourier-domain mask, or None if the mask should be determined from the
+            position of the spectral peak.
+        coefficients : `~numpy.ndarray` or None
+            Polynomial coefficients of the digital phase mask shared by all propagation
+            distances of this reconstruction, or None if the digital phase mask is fitted
+            at every propagation distance.
         """
 
         propagation_distance = np.atleast_1d(propagation_distance)
+
+        if plan is not None:
+            self.plan = plan
         
         # Determine location of spectral peak
         # Did we specify a centroid? OK, use it.
@@ -373,15 +1418,18 @@ class Hologram(object):
             message = ("Fourier mask dimensions don't match hologram dimensions. Ignoring.")
             warnings.warn(message, MaskSizeWarning)
         
-        if propagation_distance.size > 1:
-            wave =  self._reconstruct_multithread(propagation_distance, fourier_mask = fourier_mask)
-        else:
-            wave = self._reconstruct(propagation_distance, fourier_mask)
-            wave = np.expand_dims(wave, axis = 2)   # single prop. distance will have the wrong shape
-        
-        # TODO: unwrap phase here
-        return ReconstructedWave(reconstructed_wave = wave, fourier_mask = fourier_mask, 
-                                 wavelength = self.wavelength, depths = propagation_distance)
+        if propagation not in PROPAGATION_MODES:
+            raise ValueError('Propagation mode {} is not one of {}'.format(propagation, PROPAGATION_MODES))
+
+        # In depth-sweep mode, the digital phase mask is fitted only once, for this reconstruction
+        coefficients = self.phase_mask_coefficients
+        if phase_mask_coefficients is not None:
+            coefficients = self._check_phase_mask_coefficients(phase_mask_coefficients)
+        if (depth_sweep or propagation == 'incremental') and coefficients is None:
+            coefficients = self._fit_phase_mask(propagation_distance[len(propagation_distance)//2], 
+                                                fourier_mask = fourier_mask, propagation = propagation)
+
+        return propagation_distance, fourier_mask, coefficients
 
     def _reconstruct(self, propagation_distance, fourier_mask=None):
         """
@@ -402,55 +1450,312 @@ class Hologram(object):
         reconstructed_wave : `~numpy.ndarray` ndim 3
             The reconstructed wave as an array of dimensions (X, Y, wavelengths)
         """
-        x_peak, y_peak = self.spectral_peak
+        mask = self._fourier_mask(fourier_mask)
+
+        # Calculate Fourier transform of impulse response function
+        G = self.plan.transfer_function(propagation_distance, self.chromatic_shift)
         
-        # Calculate mask radius. TODO: Update 250 to an automated guess based on input values.
-        if self.rebin_factor != 1:
-            mask_radius = 150./self.rebin_factor
-        elif self.crop_fraction is not None and self.crop_fraction != 0:
-            mask_radius = 150.*self.crop_fraction
-        else:
-            mask_radius = 150.
+        digital_phase_mask = self._fit_digital_phase_mask(G, mask)
+        spectrum = self._centered_spectrum(mask, digital_phase_mask, 
+                                           ramps = _centering_ramps(self.hologram.shape))
+        return self._propagate(spectrum, G)
+
+    def _reconstruct_stack(self, propagation_distances, fourier_mask=None, chunk_size=DEPTH_CHUNK_SIZE,
+                           propagation='direct', reseed_interval=RESEED_INTERVAL, crop_sideband=False,
+                           outputs=('wave',), in_memory=True, out=None, workspace=None,
+                           phase_mask_coefficients=None):
+        """
+        Reconstruct the wave at multiple propagation distances, for all wavelengths.
+
+        Propagation distances are processed in chunks of ``chunk_size``: the product of the 
+        centered spectrum and transfer functions is assembled for the whole chunk, which is 
+        then inverse-transformed at once, and written into a preallocated cube. Intensity
+        and phase are computed from each chunk.
+
+        Parameters
+        ----------
+        propagation_distances : `~numpy.ndarray` or list
+            Propagation distances to reconstruct [m]
+        fourier_mask : array_like or None, optional
+            Fourier-domain mask. If None (default), a mask is determined from the position of the
+            main spectral peak.
+        chunk_size : int, optional
+            Number of propagation distances transformed together.
+        propagation : {'direct', 'incremental'}, optional
+            Propagation mode. See `~shampoo.ReconstructionPlan.transfer_functions`.
+        reseed_interval : int, optional
+            Number of incremental steps between exact evaluations of the transfer function.
+        crop_sideband : bool, optional
+            If True, only the bounding box of the masked sideband is inverse-transformed.
+            See `~shampoo.Hologram.reconstruct`.
+        outputs : iterable of {'wave', 'intensity', 'phase'}, optional
+            Quantities to compute. See `~shampoo.Hologram.reconstruct`.
+        in_memory : bool, optional
+            If False, outputs are written to temporary `~numpy.memmap` arrays.
+        out : `~numpy.ndarray` or None, optional
+            Array of dimensions (X, Y, Z, wavelengths) in which to write the reconstructed wave.
+            If None (default), a new array is allocated if 'wave' is in ``outputs``.
+        workspace : Workspace or None, optional
+            Scratch arrays. If None (default), scratch arrays are allocated for this call only.
+        phase_mask_coefficients : `~numpy.ndarray` or None, optional
+            Polynomial coefficients of the digital phase mask shared by all propagation 
+            distances. If None (default), the digital phase mask is fitted at every 
+            propagation distance.
+
+        Returns
+        -------
+        wave_cube : `~numpy.ndarray` or None
+            The reconstructed wave as an array of dimensions (X, Y, Z, wavelengths), 
+            or None if 'wave' is not in ``outputs``.
+        intensity : `~numpy.ndarray` or None
+            Intensity of dimensions (X, Y, Z, wavelengths), or None if 'intensity' is not in ``outputs``.
+        phase : `~numpy.ndarray` or None
+            Unwrapped phase, or None if 'phase' is not in ``outputs``. See `~shampoo.unwrap_phase`.
+        """
+        num_depths, nchannels = len(propagation_distances), self.wavelength.size
+
+        def allocate(shape, dtype):
+            if in_memory:
+                return np.empty(shape = shape, dtype = dtype)
+            return np.memmap(tempfile.TemporaryFile(), dtype = dtype, mode = 'w+', shape = shape)
+
+        wave_cube, intensity, phase = out, None, None
+        if 'wave' in outputs and wave_cube is None:
+            shape = self._wave_shape(fourier_mask, crop_sideband)
+            wave_cube = allocate(shape + (num_depths, nchannels), self.complex_dtype)
+
+        # Chunks that are not kept are reduced before the next chunk overwrites them
+        if workspace is None:
+            workspace = Workspace()
+        chunks = self._iter_stack(propagation_distances, fourier_mask = fourier_mask, chunk_size = chunk_size,
+                                  propagation = propagation, reseed_interval = reseed_interval, 
+                                  crop_sideband = crop_sideband, out = wave_cube, workspace = workspace,
+                                  phase_mask_coefficients = phase_mask_coefficients)
+        for start, wave in chunks:
+            depths = slice(start, start + wave.shape[2])
+            if 'intensity' in outputs:
+                if intensity is None:
+                    intensity = allocate(wave.shape[:2] + (num_depths, nchannels), self.real_dtype)
+                np.abs(wave, out = intensity[:,:,depths])
+            if 'phase' in outputs:
+                unwrapped = unwrap_phase(wave, self.wavelength, unwrap_method = self.unwrap_method)
+                if phase is None:
+                    phase = allocate(unwrapped.shape[:2] + (num_depths,) + unwrapped.shape[3:], 
+                                     self.real_dtype)
+                phase[:,:,depths] = unwrapped
+        return wave_cube, intensity, phase
+
+    def _iter_stack(self, propagation_distances, fourier_mask=None, chunk_size=DEPTH_CHUNK_SIZE,
+                    propagation='direct', reseed_interval=RESEED_INTERVAL, crop_sideband=False, out=None,
+                    workspace=None, phase_mask_coefficients=None):
+        """
+        Generator of the reconstructed wave for successive chunks of ``propagation_distances``.
+        Parameters are described in `~shampoo.Hologram._reconstruct_stack`.
+
+        Parameters
+        ----------
+        out : `~numpy.ndarray` or None, optional
+            Array of dimensions (X, Y, Z, wavelengths) in which chunks are written. If None
+            (default), chunks are written in a scratch array of ``workspace``, or in a new 
+            array for every chunk if ``workspace`` is None.
+        workspace : Workspace or None, optional
+            Scratch arrays for the spectrum and the transformed chunks. If None (default), 
+            scratch arrays are allocated for this call only.
+
+        Yields
+        ------
+        start : int
+            Index of the first propagation distance of the chunk.
+        wave : `~numpy.ndarray`, ndim 4
+            The reconstructed wave for this chunk, of dimensions (X, Y, chunk_size, wavelengths)
+        """
+        mask = self._fourier_mask(fourier_mask)
+        scratch = workspace if workspace is not None else Workspace()
+
+        # The inverse transform can be restricted to the bounding box of the sideband
+        box, correction = (slice(None), slice(None)), None
+        if crop_sideband:
+            box, correction = self._sideband_box(mask)
+        shape = tuple(len(range(*b.indices(n))) for b, n in zip(box, self.hologram.shape))
+        ramps = _centering_ramps(self.hologram.shape, box)
+
+        # The masked and centered spectrum is independent of the propagation distance
+        # once the digital phase mask is fixed
+        spectrum = None
+        if phase_mask_coefficients is not None:
+            digital_phase_mask = self.digital_phase_mask(phase_mask_coefficients)
+            spectrum = self._centered_spectrum(mask, digital_phase_mask, ramps = ramps,
+                                               out = scratch.buffer('spectrum', mask.shape, self.complex_dtype))
+
+        nchannels = self.wavelength.size
+        transfer_functions = self.plan.transfer_functions(propagation_distances, self.chromatic_shift,
+                                                          propagation = propagation, 
+                                                          reseed_interval = reseed_interval)
+
+        chunk_shape = shape + (min(chunk_size, len(propagation_distances)), nchannels)
+        psi_buffer = scratch.buffer('psi', chunk_shape, self.complex_dtype)
+        for start in range(0, len(propagation_distances), chunk_size):
+            chunk = propagation_distances[start:start + chunk_size]
+            psi = psi_buffer[:,:,:len(chunk),:]
+            
+            for index, G in zip(range(len(chunk)), transfer_functions):
+                if spectrum is None:
+                    digital_phase_mask = self._fit_digital_phase_mask(G, mask)
+                    centered = self._centered_spectrum(mask, digital_phase_mask, ramps = ramps,
+                                                       out = scratch.buffer('spectrum', mask.shape, 
+                                                                            self.complex_dtype))
+                    np.multiply(centered[box], G[box], out = psi[:,:,index,:])
+                else:
+                    np.multiply(spectrum[box], G[box], out = psi[:,:,index,:])
+            
+            if out is not None:
+                wave = out[:,:,start:start + len(chunk),:]
+            elif workspace is not None:
+                wave = workspace.buffer('wave', chunk_shape, self.complex_dtype)[:,:,:len(chunk),:]
+            else:
+                wave = np.empty_like(psi)
+            wave[:] = _ifft2_stack(psi)
+            if correction is not None:
+                wave *= correction[:,:,None,None]
+            yield start, wave
+
+    def _wave_shape(self, fourier_mask=None, crop_sideband=False):
+        """ Dimensions (X, Y) of the reconstructed wave. """
+        if not crop_sideband:
+            return self.hologram.shape
+        box, _ = self._sideband_box(self._fourier_mask(fourier_mask))
+        return tuple(len(range(*b.indices(n))) for b, n in zip(box, self.hologram.shape))
+
+    def _sideband_box(self, mask):
+        """
+        Bounding box of the masked sideband in the centered spectrum, enlarged to an even
+        fast Fourier transform length.
+
+        Returns
+        -------
+        box : tuple of slices
+            Slices of the centered spectrum along the first two axes.
+        correction : `~numpy.ndarray` or None
+            Factor of dimensions (X, Y) such that the inverse transform of the box, multiplied
+            by ``correction``, samples the full-resolution reconstructed wave. None if
+            the sideband cannot be cropped.
+        """
+        x_peak, y_peak = self.spectral_peak
+        x_peak, y_peak = x_peak.reshape(-1), y_peak.reshape(-1)
+
+        box, factors = list(), list()
+        for axis, peaks in ((0, x_peak), (1, y_peak)):
+            n = self.hologram.shape[axis]
+
+            # Largest distance between the spectral peak and the edge of the mask
+            half_width = 0
+            support = np.any(mask, axis = 1 - axis)
+            for channel, peak in enumerate(peaks):
+                indices = np.nonzero(support[:,channel])[0]
+                if indices.size:
+                    distances = (indices - peak + n//2) % n - n//2
+                    half_width = max(half_width, np.abs(distances).max() + 1)
+
+            m = next_fast_length(2*half_width, even = True)
+            if m >= n:
+                box.append(slice(None))
+                factors.append(np.ones(n))
+                continue
+
+            # After the centering shift, spectral peaks are located at (n + 1)//2
+            start = (n + 1)//2 - m//2
+            t = np.arange(m) - m/2
+            box.append(slice(start, start + m))
+            factors.append(m/n * np.exp(2j*np.pi*start*t/m))
         
-        # Either use a Fourier-domain mask based on coords of spectral peak,
-        # or a user-specified mask
+        if box == [slice(None), slice(None)]:
+            return tuple(box), None
+        return tuple(box), np.outer(*factors)
+
+    def _fourier_mask(self, fourier_mask=None):
+        """
+        Fourier-domain mask of dimensions (X, Y, wavelengths). If ``fourier_mask`` is None,
+        the mask is determined from the position of the main spectral peak.
+        """
         if fourier_mask is None:
-            mask = self.real_image_mask(x_peak, y_peak, mask_radius)
+            x_peak, y_peak = self.spectral_peak
+            mask = self.real_image_mask(x_peak, y_peak, self.plan.mask_radius)
         else:
             mask = np.asarray(fourier_mask, dtype=np.bool)
-        mask = np.atleast_3d(mask)
+        return np.atleast_3d(mask)
 
-        # Calculate Fourier transform of impulse response function
-        G = self.fourier_trans_of_impulse_resp_func(np.atleast_1d([propagation_distance]*
-                                self.wavelength.size).reshape((1,1,-1))-self.chromatic_shift)
-        
-        # Now calculate digital phase mask. First center the spectral peak for each channel
-        x_peak, y_peak = x_peak.reshape(-1), y_peak.reshape(-1)
-        shifted_ft_hologram = np.empty_like(np.atleast_3d(mask),dtype=np.complex128)
+    def _centered_spectrum(self, mask, digital_phase_mask=None, out=None, ramps=None):
+        """
+        Masked Fourier transform of the apodized hologram, with the spectral peak of each
+        channel shifted to the center. Only the masked frequencies are evaluated, and these
+        are written directly at their centered position: no array is shifted.
+
+        Parameters
+        ----------
+        mask : `~numpy.ndarray`, ndim 3
+            Fourier-domain mask of dimensions (X, Y, wavelengths)
+        digital_phase_mask : `~numpy.ndarray` or None, optional
+            Digital phase mask applied to the hologram before the Fourier transform.
+            If None (default), the cached Fourier transform of the hologram is used.
+        out : `~numpy.ndarray` or None, optional
+            Array of dimensions (X, Y, wavelengths) in which to write the spectrum. If None
+            (default), a new array is allocated.
+        ramps : tuple of `~numpy.ndarray` or None, optional
+            Phase ramps along axes 0 and 1 multiplied with the spectrum, so that its inverse 
+            Fourier transform is centered. See `_centering_ramps`. If None (default), the
+            spectrum is not modulated.
+
+        Returns
+        -------
+        spectrum : `~numpy.ndarray`, ndim 3
+            Array of dimensions (X, Y, wavelengths)
+        """
+        x_peak, y_peak = self.spectral_peak
+        x_peak, y_peak = x_peak.reshape(-1).astype(int), y_peak.reshape(-1).astype(int)
+        nx, ny = self.hologram.shape
+
+        if digital_phase_mask is not None:
+            apodized_hologram = self.apodize(self.hologram)
+
+        spectrum = out
+        if spectrum is None:
+            spectrum = np.zeros_like(mask, dtype=self.complex_dtype)
+        else:
+            spectrum.fill(0)
         for channel in range(self.wavelength.size):
-            shifted_ft_hologram[:,:,channel] = arrshift(self.ft_hologram * mask[:,:,channel],
-                                                        [-x_peak[channel], 
-                                                         -y_peak[channel]],
-                                                        axes = (0,1))
-        
-        # Apodize the result
-        psi = self.apodize(shifted_ft_hologram * G)
-        digital_phase_mask = self.get_digital_phase_mask(psi)
-
-        # Reconstruct the image
-        # fftshift is independent of channel
-        psi = np.empty_like(np.atleast_3d(shifted_ft_hologram))
-
-        for channel in range(psi.shape[2]):
-            psi[:,:,channel] = arrshift(fftshift(fft2(self.apodize(self.hologram) * digital_phase_mask[:,:,channel], 
-                                        axes = (0,1))) * 
-                                        mask[:,:,channel],
-                                        [-x_peak[channel], 
-                                         -y_peak[channel]],
-                                        axes = (0,1))
-        psi *= G
-        
-        return fftshift(ifft2(psi, axes = (0,1)), axes = (0,1))
+            # Mask indices are in the frame of ft_hologram, where the zero frequency is at
+            # (nx//2, ny//2); after centering, the spectral peak is at ((nx+1)//2, (ny+1)//2)
+            rows, columns = np.nonzero(mask[:,:,channel])
+            source = (rows - nx//2) % nx, (columns - ny//2) % ny
+            destination = ((rows + (nx+1)//2 - x_peak[channel]) % nx, 
+                           (columns + (ny+1)//2 - y_peak[channel]) % ny)
+            
+            if digital_phase_mask is None:
+                values = hermitian_values(self.rft_hologram, ny, *source)
+            else:
+                values = fft2(apodized_hologram * digital_phase_mask[:,:,channel], axes = (0,1))[source]
+            
+            if ramps is not None:
+                values = values * ramps[0][destination[0]] * ramps[1][destination[1]]
+            spectrum[destination + (channel,)] = values
+        return spectrum
+
+    def _fit_digital_phase_mask(self, G, mask):
+        """
+        Digital phase mask fitted on the reconstruction of the hologram
+        with the transfer function ``G``.
+        """
+        psi = self.apodize(self._centered_spectrum(mask) * G)
+        return self.get_digital_phase_mask(psi)
+
+    def _propagate(self, spectrum, G):
+        """
+        Inverse Fourier transform of the centered spectrum multiplied by the transfer
+        function ``G``, i.e. the reconstructed wave of dimensions (X, Y, wavelengths).
+        The spectrum is modulated by the phase ramps of `_centering_ramps`, see 
+        `~shampoo.Hologram._centered_spectrum`.
+        """
+        return _ifft2_stack(spectrum * G)
 
     def get_digital_phase_mask(self, psi):
         """
@@ -469,9 +1774,20 @@ class Hologram(object):
         phase_mask : `~numpy.ndarray`
             Digital phase mask, used for correcting phase aberrations.
         """
-        inverse_psi = fftshift(ifft2(psi, axes = (0 ,1)), axes = (0, 1))
+        return self.digital_phase_mask(self._fit_phase_mask_coefficients(psi))
+
+    def _fit_phase_mask_coefficients(self, psi):
+        """
+        Polynomial coefficients of the digital phase mask, of dimensions (6, Y, wavelengths).
+        See `~shampoo.Hologram.get_digital_phase_mask`.
+        """
+        # The inverse transform is centered by modulating the spectrum rather than shifting
+        rx, ry = _centering_ramps(psi.shape[:2], dtype = np.result_type(psi.dtype, np.complex64))
+        ramp = np.outer(rx, ry).reshape(psi.shape[:2] + (1,) * (psi.ndim - 2))
+        inverse_psi = _ifft2_stack(psi * ramp)
 
-        unwrapped_phase_image = np.atleast_3d(unwrap_phase(inverse_psi))/2/self.wavenumber
+        unwrapped_phase_image = np.atleast_3d(unwrap_phase(inverse_psi, unwrap_method = self.unwrap_method))
+        unwrapped_phase_image /= 2*self.wavenumber
         smooth_phase_image = gaussian_filter(unwrapped_phase_image, [50, 50, 0]) # do not filter along axis 2
 
         high = np.percentile(unwrapped_phase_image, 99)
@@ -485,24 +1801,74 @@ class Hologram(object):
         # This is iterated over all wavelength channels separately
         # TODO: can this be done on the smooth_phase_image along axis 2 instead
         # of direct iteration?
-        smooth_phase_image = smooth_phase_image
         channels = np.split(smooth_phase_image, smooth_phase_image.shape[2], axis = 2)
-        fits = list()
-
-        # Need to flip mgrid indices for this least squares solution
-        y, x = self.mgrid - self.n/2
-        x, y = np.squeeze(x), np.squeeze(y)
+        v = self.plan.phase_mask_basis
 
+        coefficients = list()
         for channel in channels:
-            v = np.array([np.ones(len(x[0, :])), x[0, :], y[:, 0], x[0, :]**2,
-                        x[0, :] * y[:, 0], y[:, 0]**2])
-            coefficients = np.linalg.lstsq(v.T, np.squeeze(channel))[0]
-            fits.append(np.dot(v.T, coefficients))
-            
+            coefficients.append(np.linalg.lstsq(v.T, np.squeeze(channel), rcond = -1)[0])
+        return np.stack(coefficients, axis = 2)
+
+    def digital_phase_mask(self, coefficients):
+        """
+        Evaluate the digital phase mask from polynomial coefficients, e.g. from
+        `~shampoo.Hologram.fit_phase_mask`.
+
+        Parameters
+        ----------
+        coefficients : `~numpy.ndarray`
+            Polynomial coefficients of the field curvature, of dimensions (6, Y, wavelengths).
+
+        Returns
+        -------
+        phase_mask : `~numpy.ndarray`
+            Digital phase mask, used for correcting phase aberrations.
+        """
+        v = self.plan.phase_mask_basis
+        fits = [np.dot(v.T, coefficients[:,:,channel]) for channel in range(coefficients.shape[2])]
         field_curvature_mask = np.stack(fits, axis = 2)
-        digital_phase_mask = np.exp(-1j*self.wavenumber * field_curvature_mask)
+        return np.exp(-1j*self.wavenumber * field_curvature_mask).astype(self.complex_dtype, copy = False)
+
+    def fit_phase_mask(self, propagation_distance, fourier_mask=None, propagation='direct'):
+        """
+        Fit the digital phase mask at ``propagation_distance``. The polynomial
+        coefficients are stored, and subsequent reconstructions of this hologram
+        reuse them at every propagation distance instead of fitting a new digital
+        phase mask each time. Call ``update_phase_mask_coefficients(None)`` to fit
+        the digital phase mask at every propagation distance again.
+
+        Parameters
+        ----------
+        propagation_distance : float
+            Propagation distance [m]
+        fourier_mask : array_like or None, optional
+            Fourier-domain mask. If None (default), a mask is determined from the position of the
+            main spectral peak.
+        propagation : {'direct', 'incremental'}, optional
+            Propagation mode of subsequent reconstructions. See `~shampoo.Hologram.reconstruct`.
+
+        Returns
+        -------
+        coefficients : `~numpy.ndarray`
+            Polynomial coefficients of the digital phase mask, of dimensions (6, Y, wavelengths).
+            These can be applied to other holograms of the same acquisition run through
+            `~shampoo.Hologram.update_phase_mask_coefficients`.
+        """
+        self.update_phase_mask_coefficients(self._fit_phase_mask(propagation_distance, 
+                                                                 fourier_mask = fourier_mask, 
+                                                                 propagation = propagation))
+        return self.phase_mask_coefficients
 
-        return digital_phase_mask
+    def _fit_phase_mask(self, propagation_distance, fourier_mask=None, propagation='direct'):
+        """
+        Polynomial coefficients of the digital phase mask fitted at ``propagation_distance``,
+        without storing them. See `~shampoo.Hologram.fit_phase_mask`.
+        """
+        mask = self._fourier_mask(fourier_mask)
+        G = self.plan.transfer_function(propagation_distance, self.chromatic_shift, 
+                                        propagation = propagation)
+        psi = self.apodize(self._centered_spectrum(mask) * G)
+        return self._fit_phase_mask_coefficients(psi)
 
     def apodize(self, array, alpha=0.075):
         """
@@ -519,15 +1885,15 @@ class Hologram(object):
         apodized_arr : `~numpy.ndarray`
             Apodized array
         """
-        if self.apodization_window_function is None:
-            x, y = self.mgrid
-            n = len(x[0])
-            tukey_window = tukey(n, alpha)
-            self.apodization_window_function = np.atleast_3d(tukey_window[:, np.newaxis] * tukey_window)
-        
         # In the most general case, array might represent a multi-wavelength hologram
-        apodized_array = np.squeeze(np.atleast_3d(array) * self.apodization_window_function)
-        return apodized_array
+        array, window = np.atleast_3d(array), self.plan.apodization_window(alpha)
+        if _is_raw_image(array):
+            # Raw images are converted to floating-point during the multiplication,
+            # without an intermediate floating-point copy
+            apodized_array = np.multiply(array, window, dtype = window.dtype)
+        else:
+            apodized_array = array * window
+        return np.squeeze(apodized_array)
         
     def fourier_trans_of_impulse_resp_func(self, propagation_distance):
         """
@@ -545,18 +1911,7 @@ class Hologram(object):
         G : `~numpy.ndarray`
             Fourier transform of impulse response function
         """
-        x, y = self.mgrid - self.n/2
-        x, y = np.atleast_3d(x), np.atleast_3d(y)
-        propagation_distance = np.atleast_3d(propagation_distance)
-        first_term = (self.wavelength**2 * (x + self.n**2 * self.dx**2 /
-                      (2.0 * propagation_distance * self.wavelength))**2 /
-                      (self.n**2 * self.dx**2))
-        second_term = (self.wavelength**2 * (y + self.n**2 * self.dy**2 /
-                       (2.0 * propagation_distance * self.wavelength))**2 /
-                       (self.n**2 * self.dy**2))
-        G = np.exp(-1j * self.wavenumber * propagation_distance *
-                   np.sqrt(1.0 - first_term - second_term))
-        return G
+        return self.plan.fourier_trans_of_impulse_resp_func(propagation_distance)
         
     def real_image_mask(self, center_x, center_y, radius):
         """
@@ -580,21 +1935,7 @@ class Hologram(object):
             Binary-valued mask centered on the real-image peak in the Fourier
             transform of the hologram.
         """
-        center_x, center_y = np.reshape(center_x, (1, 1, -1)), np.reshape(center_y, (1, 1, -1))
-        x, y = self.mgrid
-        x, y = x[:,:,None], y[:,:,None]
-        x_shift = x-center_x
-        y_shift = y-center_y
-        mask = np.zeros_like(np.atleast_3d(x_shift), dtype = np.bool)
-        mask[(x_shift)**2 + (y_shift)**2 < radius**2] = True
-
-        # exclude corners
-        #buffer = 20
-        #if self.crop_fraction is not None:
-        #    buffer = buffer*self.crop_fraction
-        #mask[((x_shift)**2 + (y_shift)**2) < buffer**2] = 0.0
-
-        return mask
+        return self.plan.real_image_mask(center_x, center_y, radius)
     
     def fourier_peak_centroid(self, gaussian_width=10):
         """
@@ -619,30 +1960,6 @@ class Hologram(object):
         return _find_peak_centroid(np.abs(self.ft_hologram), self.wavelength, gaussian_width)
         
         
-    def _reconstruct_multithread(self, propagation_distances, fourier_mask=None):
-        """
-        Reconstruct phase or intensity for multiple distances, for one hologram.
-        Parameters
-        ----------
-        propagation_distances : `~numpy.ndarray` or list
-            Propagation distances to reconstruct
-        threads : int
-            Number of threads to use via `~multiprocessing`
-        fourier_mask : array_like or None, optional
-            Fourier-domain mask. If None (default), a mask is determined from the position of the main
-            spectral peak. If array_like, the array will be cast to boolean.
-        Returns
-        -------
-        wave_cube : `~numpy.ndarray`, ndim 4
-        """ 
-        cube = np.empty(shape = self.hologram.shape + (self.wavelength.size, len(propagation_distances)),
-                        dtype = np.complex)
-        with Pool(None) as pool:
-            slices = pool.map( partial(self._reconstruct, fourier_mask = fourier_mask), propagation_distances)
-        
-        cube = np.stack(slices, axis = 3)        
-        return np.swapaxes(cube, 2, 3)
-    
     def update_spectral_peak(self, spectral_peak):
         """
         Update spectral peak centroid values.
@@ -683,13 +2000,73 @@ class Hologram(object):
             
         self._chromatic_shift = chromatic_shift
 
-def unwrap_phase(reconstructed_wave, wavelength=None):
+    def update_phase_mask_coefficients(self, coefficients):
+        """
+        Update the polynomial coefficients of the digital phase mask. 
+        
+        Parameters
+        ----------
+        coefficients : `~numpy.ndarray` or None
+            Polynomial coefficients of dimensions (6, Y, wavelengths), e.g. from
+            `~shampoo.Hologram.fit_phase_mask`. If None, the digital phase mask
+            is fitted at every propagation distance again.
+        """
+        if coefficients is not None:
+            coefficients = self._check_phase_mask_coefficients(coefficients)
+        self._phase_mask_coefficients = coefficients
+
+    def _check_phase_mask_coefficients(self, coefficients):
+        """
+        Polynomial coefficients of the digital phase mask as a float array,
+        after checking that they are of dimensions (6, Y, wavelengths).
+        """
+        coefficients = np.asarray(coefficients, dtype = float)
+        expected_shape = (6, self.hologram.shape[1], self.wavelength.shape[2])
+        if coefficients.shape != expected_shape:
+            message = ("Phase mask coefficients must be of shape {0}. "
+                       .format(expected_shape))
+            raise UpdateError(message)
+        return coefficients
+
+def unwrap_phase(reconstructed_wave, wavelength=None, unwrap_method='skimage', workers=-1, chunk_size=None):
+    """
+    Unwrapped phase of a complex reconstructed wave. If three wavelengths are given,
+    multi-wavelength phase unwrapping is performed instead.
+
+    Parameters
+    ----------
+    reconstructed_wave : `~numpy.ndarray`
+        Complex reconstructed wave
+    wavelength : `~numpy.ndarray` or None, optional
+        Wavelengths of the reconstructed wave.
+    unwrap_method : {'skimage', 'dct'}, optional
+        If 'skimage' (default), `~skimage.restoration.unwrap_phase` is used. If 'dct', the 
+        least-squares unwrapper of Ghiglia & Romero (1994) is used: it is much faster, 
+        and unwraps all 2D slices at once, but the unwrapped phase is smoothed over 
+        phase discontinuities. It is best suited to smooth phase images.
+    workers : int, optional
+        Number of threads unwrapping 2D slices concurrently with the 'skimage' method. 
+        Negative values count from the number of CPUs, e.g. -1 (default) means all CPUs.
+    chunk_size : int or None, optional
+        Number of propagation distances unwrapped together in multi-wavelength unwrapping,
+        which bounds the size of temporary arrays. If None (default), all propagation
+        distances are unwrapped together.
+
+    Returns
+    -------
+    `~numpy.ndarray`
+        Unwrapped phase image. Every 2D slice along axes 0 and 1 is unwrapped separately.
+    """
+    if unwrap_method not in UNWRAP_METHODS:
+        raise ValueError('Unwrapping method {} is not one of {}'.format(unwrap_method, UNWRAP_METHODS))
+
     if wavelength is not None and wavelength.size == 3:
-        return _unwrap_phase_multiwavelength(reconstructed_wave, wavelength.reshape(-1))
+        return _unwrap_phase_multiwavelength(reconstructed_wave, wavelength.reshape(-1), 
+                                             chunk_size = chunk_size)
     else:
-        return _unwrap_phase(reconstructed_wave)
+        return _unwrap_phase(reconstructed_wave, unwrap_method = unwrap_method, workers = workers)
 
-def _unwrap_phase(reconstructed_wave, seed=RANDOM_SEED):
+def _unwrap_phase(reconstructed_wave, seed=RANDOM_SEED, unwrap_method='skimage', workers=-1):
     """
     2D phase unwrap a complex reconstructed wave.
     Essentially a wrapper around the `~skimage.restoration.unwrap_phase`
@@ -700,6 +2077,10 @@ def _unwrap_phase(reconstructed_wave, seed=RANDOM_SEED):
         Complex reconstructed wave
     seed : float (optional)
         Random seed, optional.
+    unwrap_method : {'skimage', 'dct'}, optional
+        Unwrapping algorithm. See `~shampoo.unwrap_phase`.
+    workers : int, optional
+        Number of threads. See `~shampoo.unwrap_phase`.
     Returns
     -------
     `~numpy.ndarray`
@@ -709,16 +2090,91 @@ def _unwrap_phase(reconstructed_wave, seed=RANDOM_SEED):
     
     # No channel, no need for shenanigans
     if phase.ndim < 3:
+        if unwrap_method == 'dct':
+            return _unwrap_phase_dct(phase)
         return skimage_unwrap_phase(phase, seed=seed)
 
-    # Each wavelength channel must be done separately
-    unwrapped = np.empty_like(reconstructed_wave)
-    unwrapped_channels = list()
-    for phase_channel in np.dsplit(phase, phase.shape[2]):
-        unwrapped_channels.append( skimage_unwrap_phase(np.squeeze(phase_channel),seed=seed) )
-    return np.dstack(unwrapped_channels)
+    # Singleton axes after axis 2 (e.g. a single wavelength) are dropped
+    shape = phase.shape[:3] + tuple(n for n in phase.shape[3:] if n != 1)
+    if unwrap_method == 'dct':
+        return _unwrap_phase_dct(phase).reshape(shape)
+
+    # Each depth and wavelength channel must be done separately
+    slices = np.ascontiguousarray(np.moveaxis(phase.reshape(phase.shape[:2] + (-1,)), 2, 0))
+    unwrapped = _unwrap_slices(slices, seed = seed, workers = workers)
+    return np.moveaxis(unwrapped, 0, 2).reshape(shape)
+
+def _unwrap_slices(slices, seed=RANDOM_SEED, workers=-1):
+    """
+    Unwrap the 2D phase images ``slices[k]`` concurrently with `~skimage.restoration.unwrap_phase`, 
+    which releases the GIL. Unwrapped images are written into a single array of the same shape.
+    """
+    unwrapped = np.empty(slices.shape, dtype = np.float64)
+
+    def unwrap(index):
+        unwrapped[index] = skimage_unwrap_phase(slices[index], seed = seed)
+
+    if workers < 0:
+        workers = cpu_count() + 1 + workers
+    workers = int(max(1, min(workers, len(slices))))
+
+    if workers == 1:
+        for index in range(len(slices)):
+            unwrap(index)
+    else:
+        with ThreadPoolExecutor(max_workers = workers) as executor:
+            # Exceptions raised in threads are re-raised here
+            list(executor.map(unwrap, range(len(slices))))
+    return unwrapped
+
+def _wrap(phase):
+    """ Wrap ``phase`` into the interval [-pi, pi). """
+    return (phase + np.pi) % (2*np.pi) - np.pi
+
+def _unwrap_phase_dct(phase):
+    """
+    Least-squares phase unwrapping, by solving the Poisson equation of the wrapped 
+    phase gradients with Neumann boundary conditions through discrete cosine transforms.
+    All 2D slices along axes 0 and 1 are unwrapped at once.
+
+    For reference, see D. C. Ghiglia and L. A. Romero, J. Opt. Soc. Am. A 11, 107-117 (1994)
+
+    Parameters
+    ----------
+    phase : `~numpy.ndarray`, ndim 2 or more
+        Wrapped phase
+
+    Returns
+    -------
+    `~numpy.ndarray`
+        Unwrapped phase image, congruent to ``phase`` in the least-squares sense.
+    """
+    nx, ny = phase.shape[:2]
+    trailing = (1,) * (phase.ndim - 2)
+
+    # Divergence of the wrapped phase gradients. Gradients vanish across the boundaries.
+    dx, dy = _wrap(np.diff(phase, axis = 0)), _wrap(np.diff(phase, axis = 1))
+    rho = np.zeros_like(phase)
+    rho[:-1] += dx
+    rho[1:] -= dx
+    rho[:,:-1] += dy
+    rho[:,1:] -= dy
+
+    # Eigenvalues of the discrete Laplacian in the basis of cosines
+    eigenvalues = (2*np.cos(np.pi*np.arange(nx)/nx).reshape((nx, 1) + trailing) + 
+                   2*np.cos(np.pi*np.arange(ny)/ny).reshape((1, ny) + trailing) - 4)
+    eigenvalues[0,0] = 1    # The constant term is undetermined
+
+    solution = dctn(rho, axes = (0, 1))
+    solution /= eigenvalues
+    solution[0,0] = 0
+    unwrapped = idctn(solution, axes = (0, 1))
+
+    # Choose the constant term which best matches the wrapped phase
+    unwrapped += np.angle(np.mean(np.exp(1j*(phase - unwrapped)), axis = (0, 1)))
+    return unwrapped
     
-def _unwrap_phase_multiwavelength(reconstructed_wave, wavelength):
+def _unwrap_phase_multiwavelength(reconstructed_wave, wavelength, chunk_size=None):
     """
     Perform multi-wavelength phase unwrapping.
 
@@ -729,7 +2185,13 @@ def _unwrap_phase_multiwavelength(reconstructed_wave, wavelength):
     Parameters
     ----------
     reconstructed_wave : `~numpy.ndarray`
-        Complex reconstructed wave
+        Complex reconstructed wave, of dimensions (X, Y, Z, 3).
+    wavelength : iterable of floats
+        The three wavelengths of the reconstructed wave.
+    chunk_size : int or None, optional
+        Number of propagation distances unwrapped together. Temporary arrays are
+        proportional to ``chunk_size``. If None (default), all propagation distances
+        are unwrapped together.
 
     Returns
     -------
@@ -738,75 +2200,96 @@ def _unwrap_phase_multiwavelength(reconstructed_wave, wavelength):
     """
     
     # TODO: Add 2-wavelength phase unwrapping.
-
-    # Due to previous implementation
-    # We must have the dimensions be (X,Y, wavelengths, Z) in this function
-    reconstructed_wave = np.swapaxes(reconstructed_wave, 2, 3)
-    
-    # Get the phase maps 
-    # np.arctan2 returns in the range (-pi,pi) so we shift to (0, 2*pi)
-    phase = np.squeeze(np.arctan2(reconstructed_wave.imag, reconstructed_wave.real) + np.pi)
-
+    wavelength = np.asarray(wavelength, dtype = float).reshape(-1)
+    num_depths = reconstructed_wave.shape[2]
+    if chunk_size is None:
+        chunk_size = num_depths
+    chunk_size = max(1, int(chunk_size))
+
+    unwrapped = np.empty(reconstructed_wave.shape, dtype = np.finfo(reconstructed_wave.dtype).dtype)
+    for start in range(0, num_depths, chunk_size):
+        depths = slice(start, start + chunk_size)
+        _unwrap_phase_multiwavelength_chunk(np.asarray(reconstructed_wave[:,:,depths]), wavelength, 
+                                            out = unwrapped[:,:,depths])
+    return unwrapped
+
+def _unwrap_phase_multiwavelength_chunk(reconstructed_wave, wavelength, out):
+    """
+    Multi-wavelength phase unwrapping of ``reconstructed_wave`` of dimensions (X, Y, Z, 3),
+    written into ``out``. Beside ``out``, temporary arrays amount to about two phase cubes.
+    See `_unwrap_phase_multiwavelength`.
+    """
     # Get the beat wavelengths
     w1,w2,w3 = tuple(wavelength)
 
     lambda_13 = w1*w3/np.abs(w1-w3)
-    lambda_23 =w1*w2/np.abs(w1-w2)
+    lambda_23 = w1*w2/np.abs(w1-w2)
     lambda_1323 = lambda_13*lambda_23/np.abs(lambda_13-lambda_23)
 
-    # Get the coarse maps
-    coarse_13 = phase[:,:,0,:]-phase[:,:,2,:]
-    coarse_23 = phase[:,:,1,:]-phase[:,:,2,:]
-    coarse_13[coarse_13<0] = coarse_13[coarse_13<0] + 2*np.pi
-    coarse_23[coarse_23<0] = coarse_23[coarse_23<0] + 2*np.pi
-    coarse_1323 = coarse_13 - coarse_23
-    coarse_1323[coarse_1323<0] = coarse_1323[coarse_1323<0] + 2*np.pi
+    # Get the phase maps 
+    # np.arctan2 returns in the range (-pi,pi) so we shift to (0, 2*pi)
+    phase = np.arctan2(reconstructed_wave.imag, reconstructed_wave.real, out = out)
+    phase += np.pi
+
+    # Get the coarse maps, in the range (0, 2*pi)
+    coarse_13 = np.subtract(phase[...,0], phase[...,2])
+    coarse_23 = np.subtract(phase[...,1], phase[...,2])
+    np.mod(coarse_13, 2*np.pi, out = coarse_13)
+    np.mod(coarse_23, 2*np.pi, out = coarse_23)
+    coarse_1323 = np.subtract(coarse_13, coarse_23, out = coarse_23)
+    np.mod(coarse_1323, 2*np.pi, out = coarse_1323)
 
     # Get the surface profiles
-    z_13 = lambda_13*coarse_13/(2*np.pi)
-    z_23 = lambda_23*coarse_23/(2*np.pi)
-    z_1323 = lambda_1323*coarse_1323/(2*np.pi)
+    z_13 = np.multiply(coarse_13, lambda_13/(2*np.pi), out = coarse_13)
+    z_1323 = np.multiply(coarse_1323, lambda_1323/(2*np.pi), out = coarse_1323)
 
     # Get the integer surface profile for maximum beat wavelength
-    z_a = np.rint(z_1323/lambda_13)*lambda_13
-    z_b = z_a + z_13
-    z_c = z_1323 - z_b
-    z_d = z_c
-    z_d[z_c[:] > lambda_13/2] = z_c[z_c[:] > lambda_13/2] + lambda_13.reshape(-1)
-    z_d[z_c[:] < -lambda_13/2] = z_c[z_c[:] < -lambda_13/2] - lambda_13.reshape(-1)
-
-    # Get surface profiles for individual wavelength
-    z = np.expand_dims(wavelength, axis = 3)*phase/(2*np.pi)
-    #for channel in range(z.shape[2]):
-    #    z[:,:,channel] = wavelength[:,:,channel]*phase[:,:,channel]/(2*np.pi)
-    z_e = np.empty_like(z)
-    for channel in range(z_e.shape[2]):
-        z_e[:,:,channel] = np.rint(z_d/wavelength[channel])*wavelength[channel]
-    z_f = z_e+z
-    z_g = np.empty_like(z_f)
-    for channel in range(z_g.shape[2]):
-        z_g[:,:,channel] = z_d-z_f[:,:,channel]
-    for channel in range(z_g.shape[2]):
-        z_f_curr = z_f[:,:,channel]
-        z_g_curr = z_g[:,:,channel]
-        z_g_curr[z_f_curr[:] > wavelength[channel]/2] = z_f_curr[z_f_curr[:] > wavelength[channel]/2] + wavelength[channel]
-        z_g_curr[z_f_curr[:] < -wavelength[channel]/2] = z_f_curr[z_f_curr[:] < -wavelength[channel]/2] - wavelength[channel]
-        z_g[:,:,channel] = z_g_curr
-
-    return np.swapaxes(z_g*2*np.pi/np.expand_dims(wavelength, axis = 3), 2, 3)    # Back to (X, Y, Z, wavelengths)
+    # z_d = z_1323 - (z_a + z_13), where z_a = rint(z_1323/lambda_13)*lambda_13
+    z_d = np.divide(z_1323, lambda_13)
+    np.rint(z_d, out = z_d)
+    z_d *= lambda_13
+    z_d += z_13
+    np.subtract(z_1323, z_d, out = z_d)
+    np.add(z_d, lambda_13, out = z_d, where = z_d > lambda_13/2)
+    np.subtract(z_d, lambda_13, out = z_d, where = z_d < -lambda_13/2)
+    z_d = z_d[...,None]
+    del coarse_13, coarse_23
+
+    # Get surface profiles for individual wavelength, for all channels at once
+    z = np.multiply(phase, wavelength/(2*np.pi), out = out)
+    z_f = np.divide(z_d, wavelength)
+    np.rint(z_f, out = z_f)
+    z_f *= wavelength
+    z_f += z
+    z_g = np.subtract(z_d, z_f, out = out)
+    np.add(z_f, wavelength, out = z_g, where = z_f > wavelength/2)
+    np.subtract(z_f, wavelength, out = z_g, where = z_f < -wavelength/2)
+
+    z_g *= 2*np.pi/wavelength
+    return z_g
 
 
 class ReconstructedWave(object):
     """
     Container for reconstructed waves and their intensity and phase
     arrays.
+
+    The reconstructed wave at a single propagation distance is accessed by indexing, 
+    e.g. ``wave[0]``. Its intensity and phase are then computed for that propagation 
+    distance only::
+
+        wave = hologram.reconstruct(np.linspace(0.09, 0.14, 150))
+        phase = wave[75].phase      # Only one slice is unwrapped
+        phase = wave.phase_at(0.12) # Closest propagation distance
     """
-    def __init__(self, reconstructed_wave, fourier_mask, wavelength, depths):
+    def __init__(self, reconstructed_wave, fourier_mask, wavelength, depths, unwrap_method='skimage',
+                 max_cached_slices=SLICE_CACHE_SIZE, intensity=None, phase=None):
         """
         Parameters
         ----------
-        reconstructed_wave : array_like, complex
-            Reconstructed wave. Last axis is wavelength channel. 
+        reconstructed_wave : array_like, complex, or None
+            Reconstructed wave. Last axis is wavelength channel. If None, only the 
+            precomputed ``intensity`` and ``phase`` are available.
         fourier_mask : array_like
             Reconstruction Fourier mask, in 2- or 3- dimensions.
         wavelength : float or array_like
@@ -814,21 +2297,116 @@ class ReconstructedWave(object):
         depths : array_like
             Reconstruction depths, corresponding to each slice of `reconstructed_wave` along
             axis 2.
+        unwrap_method : {'skimage', 'dct'}, optional
+            Phase unwrapping algorithm. See `~shampoo.unwrap_phase`. Default is 'skimage'.
+        max_cached_slices : int, optional
+            Maximum number of single propagation distances, accessed by indexing, whose 
+            intensity and phase are kept in memory. Least-recently used slices are 
+            discarded first. Default is 16.
+        intensity : `~numpy.ndarray` or None, optional
+            Precomputed intensity of the reconstructed wave.
+        phase : `~numpy.ndarray` or None, optional
+            Precomputed unwrapped phase of the reconstructed wave.
         """
         self.reconstructed_wave = reconstructed_wave
         self.depths = np.atleast_1d(depths)
-        self._intensity_image = None
-        self._phase_image = None
+        self._intensity_image = intensity
+        self._phase_image = phase
         self.fourier_mask = np.asarray(fourier_mask, dtype = np.bool)
         self.wavelength = np.atleast_1d(wavelength)
+        self.unwrap_method = unwrap_method
         self.random_seed = RANDOM_SEED
+        self.max_cached_slices = int(max_cached_slices)
+        self._slices = OrderedDict()
+
+    def __len__(self):
+        return len(self.depths)
+
+    def __getitem__(self, index):
+        """
+        Reconstructed wave at the propagation distance(s) ``index``, as a ReconstructedWave.
+        Single propagation distances are cached, along with their intensity and phase.
+
+        Raises
+        ------
+        IndexError
+            If ``index`` is out of range.
+        """
+        if isinstance(index, slice):
+            return self._slice(index)
+
+        index = int(index)
+        if index < 0:
+            index += len(self)
+        if not (0 <= index < len(self)):
+            raise IndexError('Depth index {} out of range for {} propagation distances.'.format(index, len(self)))
+
+        if index in self._slices:
+            self._slices[index] = self._slices.pop(index)   # Mark as most-recently used
+            return self._slices[index]
+
+        wave = self._slice(slice(index, index + 1))
+        self._slices[index] = wave
+        while len(self._slices) > self.max_cached_slices:
+            self._slices.popitem(last = False)
+        return wave
+
+    def _slice(self, depths):
+        """ ReconstructedWave at the propagation distances selected by the slice ``depths`` """
+        reconstructed_wave = self.reconstructed_wave
+        if reconstructed_wave is not None:
+            reconstructed_wave = reconstructed_wave[:,:,depths]
+        wave = ReconstructedWave(reconstructed_wave, fourier_mask = self.fourier_mask,
+                                 wavelength = self.wavelength, depths = self.depths[depths], 
+                                 unwrap_method = self.unwrap_method)
+        # Share arrays that were already computed for all propagation distances
+        if self._intensity_image is not None:
+            wave._intensity_image = self._intensity_image[:,:,depths]
+        if self._phase_image is not None:
+            wave._phase_image = self._phase_image[:,:,depths]
+        return wave
+
+    def depth_index(self, depth):
+        """ Index of the propagation distance closest to ``depth`` [m] """
+        return int(np.argmin(np.abs(self.depths - depth)))
+
+    def intensity_at(self, depth):
+        """
+        Intensity at the propagation distance closest to ``depth`` [m]. Contrary to 
+        `~shampoo.ReconstructedWave.intensity`, other propagation distances are not computed.
+
+        Returns
+        -------
+        intensity : `~numpy.ndarray`
+            Array of dimensions (X, Y, wavelengths).
+        """
+        return self[self.depth_index(depth)].intensity[:,:,0]
+
+    def phase_at(self, depth):
+        """
+        Unwrapped phase at the propagation distance closest to ``depth`` [m]. Contrary to 
+        `~shampoo.ReconstructedWave.phase`, other propagation distances are not unwrapped.
+
+        Returns
+        -------
+        phase : `~numpy.ndarray`
+            Array of dimensions (X, Y), or (X, Y, wavelengths) for multi-wavelength unwrapping.
+        """
+        return self[self.depth_index(depth)].phase[:,:,0]
     
     @property
     def intensity(self):
         """
         `~numpy.ndarray` of the reconstructed intensity
+
+        Raises
+        ------
+        ValueError
+            If the intensity was not computed during reconstruction, and the 
+            reconstructed wave was discarded. See `~shampoo.Hologram.reconstruct`.
         """
         if self._intensity_image is None:
+            self._require_wave('intensity')
             self._intensity_image = np.abs(self.reconstructed_wave)
 
         return self._intensity_image
@@ -838,9 +2416,25 @@ class ReconstructedWave(object):
         """
         `~numpy.ndarray` of the reconstructed, unwrapped phase.
 
-        Returns the unwrapped phase using `~skimage.restoration.unwrap_phase`.
+        Returns the unwrapped phase using `~skimage.restoration.unwrap_phase`, or the 
+        least-squares unwrapper if ``unwrap_method`` is 'dct'. See `~shampoo.unwrap_phase`.
+
+        Raises
+        ------
+        ValueError
+            If the phase was not computed during reconstruction, and the 
+            reconstructed wave was discarded. See `~shampoo.Hologram.reconstruct`.
         """
         if self._phase_image is None:
-            self._phase_image = unwrap_phase(self.reconstructed_wave, self.wavelength)
-
-        return self._phase_image
\ No newline at end of file
+            self._require_wave('phase')
+            self._phase_image = unwrap_phase(self.reconstructed_wave, self.wavelength, 
+                                             unwrap_method = self.unwrap_method)
+            self._phase_image = self._phase_image.astype(self.reconstructed_wave.real.dtype, copy = False)
+
+        return self._phase_image
+
+    def _require_wave(self, quantity):
+        """ Raise a ValueError if ``quantity`` cannot be computed from the reconstructed wave """
+        if self.reconstructed_wave is None:
+            raise ValueError("The {0} is unavailable, since the reconstructed wave was discarded. Include "
+                             "'{0}' in the outputs of Hologram.reconstruct.".format(quantity))
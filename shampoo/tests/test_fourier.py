@@ -0,0 +1,77 @@
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+from .. import fourier
+from ..fourier import (set_fft_backend, get_fft_backend, fft2, ifft2, real_fft2, dctn, idctn,
+                       hermitian_values, next_fast_length)
+from ..reconstruction import Hologram
+
+import numpy as np
+
+import pytest
+
+@pytest.fixture
+def restore_backend():
+    """ Restore the FFT backend selected before a test """
+    backend = get_fft_backend()
+    yield
+    fourier._backend = backend
+
+def test_fft_backends(restore_backend):
+    """ Test that all available backends compute the same transforms """
+    x = np.random.random((64, 64, 3)) + 1j*np.random.random((64, 64, 3))
+    expected = np.fft.fft2(x, axes = (0, 1))
+
+    for name in ('scipy', 'numpy', 'pyfftw'):
+        try:
+            backend = set_fft_backend(name, workers = 2)
+        except ImportError:
+            continue
+        assert get_fft_backend() is backend
+        assert np.allclose(fft2(x, axes = (0, 1)), expected)
+        assert np.allclose(ifft2(fft2(x, axes = (0, 1)), axes = (0, 1)), x)
+        assert np.allclose(idctn(dctn(x.real, axes = (0, 1)), axes = (0, 1)), x.real)
+
+def test_fft_backend_reconstruction(restore_backend):
+    """ Test that reconstructions do not depend on the FFT backend """
+    im = 1000*np.ones((128, 128)) + np.random.randn(128, 128)
+
+    set_fft_backend('scipy')
+    h = Hologram(im)
+    scipy_wave = h.reconstruct(0.2).reconstructed_wave
+
+    set_fft_backend('numpy')
+    numpy_wave = Hologram(im).reconstruct(0.2).reconstructed_wave
+    assert np.allclose(scipy_wave, numpy_wave, atol = 1e-6 * np.abs(scipy_wave).max())
+
+def test_unknown_fft_backend():
+    """ Test that unknown backends raise a ValueError """
+    with pytest.raises(ValueError):
+        set_fft_backend('not_a_backend')
+
+def test_real_fft2():
+    """ Test that the half-spectrum transform of real arrays is completed by conjugate symmetry """
+    for shape in [(64, 64), (63, 65), (32, 17)]:
+        x = np.random.random(shape)
+        assert np.allclose(real_fft2(x), np.fft.fft2(x))
+
+def test_hologram_half_spectrum():
+    """ Test that the spectrum of holograms is computed from its non-negative frequencies """
+    holo = Hologram(1000*np.ones((128, 128)) + np.random.randn(128, 128))
+    expected = np.fft.fftshift(np.fft.fft2(holo.apodize(holo.hologram)))
+    assert holo.rft_hologram.shape == (128, 65)
+    assert np.allclose(holo.ft_hologram, expected)
+
+    # Masked frequencies of the centered spectrum, evaluated from the half-spectrum
+    mask = np.zeros((128, 128), dtype = bool)
+    mask[10:40, 90:120] = True
+    rows, columns = np.nonzero(mask)
+    values = hermitian_values(holo.rft_hologram, 128, (rows - 64) % 128, (columns - 64) % 128)
+    assert np.allclose(values, expected[rows, columns])
+
+def test_next_fast_length():
+    """ Test that fast lengths only have prime factors 2, 3, 5 and 7 """
+    assert next_fast_length(61) == 63
+    assert next_fast_length(61, even = True) == 64
+    assert next_fast_length(1021) == 1024
+    assert next_fast_length(2048) == 2048
@@ -1,14 +1,25 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
-from ..reconstruction import (Hologram, rebin_image, _find_peak_centroid,
-                              RANDOM_SEED, _crop_image, CropEfficiencyWarning)
+from .. import reconstruction
+from ..reconstruction import (Calibration, Hologram, rebin_image, _find_peak_centroid,
+                              RANDOM_SEED, _crop_image, CropEfficiencyWarning,
+                              ReconstructionPlan, SizeError, UpdateError,
+                              ArrayCache, Workspace, get_array_cache, unwrap_phase,
+                              fftshift, _centering_ramps)
 
 import numpy as np
 np.random.seed(RANDOM_SEED)
 
 import pytest
 
+@pytest.fixture
+def array_cache(monkeypatch):
+    """ Replace the array cache shared by all plans with an empty, smaller cache during a test """
+    cache = ArrayCache(max_bytes = '16MB')
+    monkeypatch.setattr(reconstruction, '_array_cache', cache)
+    return cache
+
 def _example_hologram(dim=256):
     """
     Generate example hologram.
@@ -20,6 +31,15 @@ def _example_hologram(dim=256):
     """
     return 1000*np.ones((dim, dim)) + np.random.randn(dim, dim)
 
+def _fringe_hologram(dim=256, kx=40, ky=60):
+    """
+    Deterministic hologram of straight fringes, whose spectral peaks are
+    ``(kx, ky)`` pixels away from the center of the spectrum.
+    """
+    x, y = np.mgrid[0:dim, 0:dim]
+    noise = np.random.RandomState(RANDOM_SEED).randn(dim, dim)
+    return 1000 + 100*np.cos(2*np.pi*(kx*x + ky*y)/dim) + noise
+
 def test_non2d_hologram():
     """ Test that non-2D holograms raise a ValueError on instantiation """
     with pytest.raises(ValueError) as e_info:
@@ -98,6 +118,16 @@ def test_centroid_multichannel():
     assert np.all(np.squeeze(_find_peak_centroid(image=test_image,wavelength=wl)) == centroid[4:])
     assert np.any(test_image[centroid] == np.max(test_image))
 
+def test_centroid_coarse_to_fine():
+    """ Test that the coarse-to-fine search of _find_peak_centroid finds the same peaks as the full search """
+    x, y = np.mgrid[0:1024, 0:1024]
+    hologram = 1000 + 100*np.cos(2*np.pi*(150*x + 250*y)/1024) + 20*np.random.randn(1024, 1024)
+    spectrum = np.abs(np.fft.fftshift(np.fft.fft2(hologram)))
+
+    coarse = _find_peak_centroid(image = spectrum, downsample = 8)
+    assert np.all(coarse == _find_peak_centroid(image = spectrum, downsample = 1))
+    assert np.all(coarse == [[512 + 150, 512 + 250]])
+
 def test_crop_image():
     # Even number rows/cols
     image1 = np.arange(1024).reshape((32, 32))
@@ -126,6 +156,138 @@ def test_phase_unwrapping_multi_wavelength():
     w = holo.reconstruct([0.2, 0.3])
     assert w.reconstructed_wave.shape == w.phase.shape
 
+def test_phase_unwrapping_threads():
+    """ Test that concurrent unwrapping of slices yields the same phase as serial unwrapping """
+    wave = Hologram(_fringe_hologram()).reconstruct([0.2, 0.3, 0.4]).reconstructed_wave
+    serial = unwrap_phase(wave, workers = 1)
+    assert serial.shape == wave.shape[:3]
+    assert np.allclose(unwrap_phase(wave, workers = 3), serial)
+
+def test_phase_unwrapping_dct():
+    """ Test that the least-squares unwrapper recovers a smooth phase, for all slices at once """
+    x, y = np.mgrid[0:128, 0:96]
+    phase = 1e-3*((x - 50)**2 + (y - 40)**2) + 0.05*x
+    phase = phase[:,:,None,None] * np.linspace(1, 2, 6).reshape((1, 1, 3, 2))
+
+    # The phase is unwrapped from the wrapped phase of the squared wave; see _unwrap_phase
+    unwrapped = unwrap_phase(np.exp(0.5j*phase), unwrap_method = 'dct')
+    assert unwrapped.shape == phase.shape
+    error = unwrapped - phase
+    assert np.allclose(error, error[0,0], atol = 1e-6)
+    assert np.allclose(np.exp(1j*error), 1)
+
+    with pytest.raises(ValueError):
+        unwrap_phase(np.exp(0.5j*phase), unwrap_method = 'unknown')
+
+    w = Hologram(_example_hologram(), unwrap_method = 'dct').reconstruct([0.2, 0.3])
+    assert w.unwrap_method == 'dct'
+    assert w.reconstructed_wave.shape == w.phase.shape + (1,)
+
+def test_phase_unwrapping_multi_wavelength_chunks():
+    """ Test that multi-wavelength unwrapping does not depend on the chunking of depths """
+    wl = np.array([450e-9, 550e-9, 650e-9])
+    wave = np.random.randn(64, 64, 5, 3) + 1j*np.random.randn(64, 64, 5, 3)
+
+    unwrapped = unwrap_phase(wave, wl)
+    assert unwrapped.shape == wave.shape
+    assert np.allclose(unwrap_phase(wave, wl, chunk_size = 2), unwrapped)
+    assert unwrap_phase(wave.astype(np.complex64), wl).dtype == np.float32
+
+def test_reconstructed_wave_slices():
+    """ Test that single propagation distances are unwrapped separately, and cached """
+    wave = Hologram(_fringe_hologram()).reconstruct([0.2, 0.3, 0.4])
+    assert len(wave) == 3
+
+    phase = wave.phase_at(0.29)
+    assert phase.shape == (256, 256)
+    assert wave._phase_image is None
+    assert wave[1] is wave[-2]
+    assert np.allclose(phase, wave.phase[:,:,1])
+    assert np.allclose(wave.intensity_at(0.4), wave.intensity[:,:,2])
+
+    wave.max_cached_slices = 1
+    wave[0]; wave[2]
+    assert list(wave._slices) == [2]
+    assert len(wave[1:]) == 2
+
+    with pytest.raises(IndexError):
+        wave[3]
+
+def test_selective_outputs(array_cache):
+    """ Test that intensity and phase can be reconstructed without keeping the complex wave """
+    im = _fringe_hologram()
+    depths = [0.2, 0.3, 0.4]
+    coefficients = Hologram(im).fit_phase_mask(0.3)
+    full = Hologram(im).reconstruct(depths, phase_mask_coefficients = coefficients)
+
+    holo = Hologram(im)
+    w = holo.reconstruct(depths, phase_mask_coefficients = coefficients, 
+                         outputs = ('intensity', 'phase'), max_memory = '1GB')
+    assert w.reconstructed_wave is None
+    assert np.allclose(w.intensity, full.intensity)
+    assert np.allclose(w.phase, full.phase)
+    assert np.allclose(w[1].intensity, full.intensity[:,:,1:2])
+
+    w = holo.reconstruct(depths, outputs = ('intensity',))
+    with pytest.raises(ValueError):
+        w.phase
+
+    with pytest.raises(ValueError):
+        holo.reconstruct(depths, outputs = ('amplitude',))
+
+def test_reconstruct_out_workspace():
+    """ Test reconstructing into a preallocated array, reusing a workspace """
+    im = _fringe_hologram()
+    depths = [0.2, 0.3, 0.4]
+    coefficients = Hologram(im).fit_phase_mask(0.3)
+    full = Hologram(im).reconstruct(depths, phase_mask_coefficients = coefficients)
+
+    out = np.empty_like(full.reconstructed_wave)
+    workspace = Workspace()
+    for _ in range(2):
+        w = Hologram(im).reconstruct(depths, phase_mask_coefficients = coefficients,
+                                     out = out, workspace = workspace)
+        assert w.reconstructed_wave is out
+        assert np.allclose(out, full.reconstructed_wave)
+    assert workspace.nbytes > 0
+
+    # Chunks are written to the scratch arrays of the workspace, which are reused
+    # by subsequent reconstructions with the same chunks
+    buffers = None
+    for _ in range(2):
+        chunks = [np.copy(chunk.reconstructed_wave) 
+                  for chunk in Hologram(im).iter_reconstruct(depths, chunk_size = 2, workspace = workspace,
+                                                             phase_mask_coefficients = coefficients)]
+        assert [chunk.shape[2] for chunk in chunks] == [2, 1]
+        assert np.allclose(np.concatenate(chunks, axis = 2), full.reconstructed_wave)
+        if buffers is None:
+            buffers = dict(workspace._buffers)
+    assert all(workspace._buffers[name] is buffer for name, buffer in buffers.items())
+
+    holo = Hologram(im)
+    with pytest.raises(ValueError):
+        holo.reconstruct(depths, out = np.empty_like(out[:,:,:2]))
+    with pytest.raises(ValueError):
+        holo.reconstruct(depths, out = out.astype(np.complex64))
+    with pytest.raises(ValueError):
+        holo.reconstruct(depths, out = out, outputs = ('intensity',))
+
+def test_centering_ramps():
+    """ Test that the centering phase ramps are equivalent to shifting the inverse transform """
+    np.random.seed(RANDOM_SEED)
+    for shape in [(64, 64), (63, 80)]:
+        spectrum = np.random.random(shape) + 1j*np.random.random(shape)
+        assert np.array_equal(fftshift(spectrum), np.fft.fftshift(spectrum))
+
+        rx, ry = _centering_ramps(shape)
+        expected = np.fft.fftshift(np.fft.ifft2(spectrum))
+        assert np.allclose(np.fft.ifft2(spectrum * np.outer(rx, ry)), expected)
+
+        box = (slice(10, 40), slice(5, 38))
+        rx, ry = _centering_ramps(shape, box)
+        expected = np.fft.fftshift(np.fft.ifft2(spectrum[box]))
+        assert np.allclose(np.fft.ifft2((spectrum * np.outer(rx, ry))[box]), expected)
+
 def test_multiple_reconstructions():
     """
     At commit cc730bd and earlier, the Hologram.apodize function modified
@@ -160,3 +322,267 @@ def test_nonsquare_hologram():
 
     assert phase_shape[0] == min(nonsq_holo.shape)
     assert phase_shape[1] == min(nonsq_holo.shape)
+
+def test_reconstruction_plan_reuse():
+    """ Test that a shared ReconstructionPlan yields the same reconstruction """
+    im = _example_hologram()
+    plan = ReconstructionPlan.from_hologram(Hologram(im))
+
+    w_default = Hologram(im).reconstruct([0.2, 0.3])
+    w_plan = Hologram(im).reconstruct([0.2, 0.3], plan = plan)
+    assert np.allclose(w_default.reconstructed_wave, w_plan.reconstructed_wave)
+
+    # Transfer functions are cached for subsequent holograms
+    G = plan.transfer_function(0.2)
+    assert G is plan.transfer_function(0.2)
+    assert G.shape == im.shape + (1,)
+
+def test_array_cache(array_cache):
+    """ Test that transfer functions are shared between plans, and that the cache is bounded """
+    im = _example_hologram()
+    cache = get_array_cache()
+    assert cache is array_cache
+
+    G = ReconstructionPlan.from_hologram(Hologram(im)).transfer_function(0.2)
+    assert cache.misses > 0 and cache.hits == 0
+    assert ReconstructionPlan.from_hologram(Hologram(im)).transfer_function(0.2) is G
+    assert cache.hits == 1
+    assert not G.flags.writeable
+
+    small = ArrayCache(max_bytes = 2 * G.nbytes)
+    for distance in (0.1, 0.2, 0.3):
+        small.get(distance, lambda: np.copy(G))
+    assert len(small) == 2 and 0.1 not in small
+    assert small.nbytes <= small.max_bytes
+
+def test_reconstruction_plan_incompatible():
+    """ Test that plans for holograms of different dimensions are refused """
+    plan = ReconstructionPlan(n = 128)
+    holo = Hologram(_example_hologram())
+    with pytest.raises(SizeError):
+        holo.reconstruct(0.2, plan = plan)
+
+def test_depth_sweep():
+    """ Test that depth sweeps share the digital phase mask fitted at the central depth """
+    im = _example_hologram()
+    wl = [450e-9, 550e-9, 650e-9]
+    holo = Hologram(im, wavelength = wl)
+
+    sweep = holo.reconstruct([0.2, 0.3, 0.4], depth_sweep = True)
+    assert sweep.reconstructed_wave.shape == holo.hologram.shape + (3, len(wl))
+
+    # The coefficients fitted for the sweep are not stored
+    assert holo.phase_mask_coefficients is None
+
+    w = holo.reconstruct(0.3)
+    assert np.allclose(sweep.reconstructed_wave[:,:,1,:], w.reconstructed_wave[:,:,0,:],
+                       atol = 1e-6 * np.abs(w.reconstructed_wave).max())
+
+def test_phase_mask_reuse():
+    """ Test that fitted phase mask coefficients are reused for all depths """
+    im = _example_hologram()
+    holo = Hologram(im)
+    assert holo.phase_mask_coefficients is None
+
+    coefficients = holo.fit_phase_mask(0.3)
+    assert coefficients.shape == (6, holo.n, 1)
+
+    # Another hologram of the same acquisition run
+    other = Hologram(im)
+    w = other.reconstruct([0.2, 0.3], phase_mask_coefficients = coefficients)
+    assert np.allclose(w.reconstructed_wave, holo.reconstruct([0.2, 0.3]).reconstructed_wave)
+
+    # Coefficients passed to a reconstruction are not stored
+    assert other.phase_mask_coefficients is None
+
+    with pytest.raises(UpdateError):
+        other.update_phase_mask_coefficients(np.zeros((6, 3, 1)))
+
+def test_incremental_propagation():
+    """ Test that incremental stepping matches the directly-evaluated angular-spectrum transfer function """
+    plan = ReconstructionPlan(n = 64, wavelength = [450e-9, 550e-9, 650e-9])
+    depths = np.linspace(0.1, 0.2, 40)
+    chromatic_shift = [1e-4, 0, -1e-4]
+
+    for depth, G in zip(depths, plan.transfer_functions(depths, chromatic_shift, propagation = 'incremental')):
+        expected = plan.transfer_function(depth, chromatic_shift, propagation = 'incremental')
+        assert np.allclose(G, expected)
+
+    with pytest.raises(ValueError):
+        list(plan.transfer_functions([0.1, 0.2, 0.4], propagation = 'incremental'))
+
+def test_incremental_reconstruction():
+    """ Test that incremental and exact angular-spectrum reconstructions agree """
+    im = _example_hologram()
+    depths = np.linspace(0.1, 0.3, 5)
+    holo = Hologram(im)
+    w = holo.reconstruct(depths, propagation = 'incremental', reseed_interval = 3)
+    assert w.reconstructed_wave.shape == holo.hologram.shape + (len(depths), 1)
+
+    coefficients = Hologram(im).fit_phase_mask(depths[2], propagation = 'incremental')
+    for index, depth in enumerate(depths):
+        exact = Hologram(im).reconstruct([depth], propagation = 'incremental', 
+                                         phase_mask_coefficients = coefficients)
+        assert np.allclose(w.reconstructed_wave[:,:,index,:], exact.reconstructed_wave[:,:,0,:])
+
+    with pytest.raises(ValueError):
+        holo.reconstruct(depths, propagation = 'not_a_mode')
+
+def test_incremental_matches_direct():
+    """ Test that incremental and direct reconstructions of a hologram are aligned """
+    depths = np.linspace(0.1, 0.3, 5)
+    holo = Hologram(_fringe_hologram())
+    holo.fit_phase_mask(depths[2])
+
+    direct = np.abs(holo.reconstruct(depths).reconstructed_wave)
+    incremental = np.abs(holo.reconstruct(depths, propagation = 'incremental').reconstructed_wave)
+    assert np.allclose(incremental, direct, atol = 0.05 * direct.max())
+
+def test_sideband_crop():
+    """ Test that sideband-cropped reconstructions sample the full-resolution reconstructions """
+    im = _example_hologram()
+    wl = [450e-9, 550e-9, 650e-9]
+    holo = Hologram(im, wavelength = wl)
+    holo.plan = ReconstructionPlan.from_hologram(holo, mask_radius = 31)
+    holo.fit_phase_mask(0.2)
+
+    full = holo.reconstruct([0.2, 0.25]).reconstructed_wave
+    cropped = holo.reconstruct([0.2, 0.25], crop_sideband = True).reconstructed_wave
+
+    # The 62-pixel-wide sideband is inverse-transformed on a 64 x 64 grid
+    assert cropped.shape == (64, 64, 2, len(wl))
+    assert np.allclose(cropped, full[::4, ::4])
+
+def test_single_precision():
+    """ Test that single-precision reconstructions agree with double-precision reconstructions """
+    im = _example_hologram()
+    wl = [450e-9, 550e-9, 650e-9]
+    double = Hologram(im, wavelength = wl)
+    single = Hologram(im, wavelength = wl, precision = 'single')
+    assert single.hologram.dtype == np.float32
+
+    # With the same digital phase mask, the difference is at the level of round-off errors
+    coefficients = double.fit_phase_mask(0.25)
+    w_double = double.reconstruct([0.2, 0.3]).reconstructed_wave
+    w_single = single.reconstruct([0.2, 0.3], phase_mask_coefficients = coefficients).reconstructed_wave
+    assert w_single.dtype == np.complex64
+    assert np.allclose(w_single, w_double, atol = 1e-5 * np.abs(w_double).max())
+
+    # Plans are specific to a precision
+    with pytest.raises(ValueError):
+        single.reconstruct(0.2, plan = double.plan)
+
+    with pytest.raises(ValueError):
+        Hologram(im, precision = 'half')
+
+def test_iter_reconstruct():
+    """ Test that iterative reconstruction yields the same waves as a complete reconstruction """
+    im = _example_hologram()
+    depths = np.linspace(0.1, 0.3, 5)
+    holo = Hologram(im)
+    holo.fit_phase_mask(0.2)
+    expected = holo.reconstruct(depths).reconstructed_wave
+
+    waves = list(holo.iter_reconstruct(depths, chunk_size = 2))
+    assert [w.reconstructed_wave.shape[2] for w in waves] == [2, 2, 1]
+    assert np.allclose(np.concatenate([w.depths for w in waves]), depths)
+    assert np.allclose(np.concatenate([w.reconstructed_wave for w in waves], axis = 2), expected)
+
+def test_memory_budget(array_cache):
+    """ Test that reconstructions are planned within a memory budget """
+    plan = ReconstructionPlan(n = 256)
+    slice_bytes = 256**2 * 16
+    cache_bytes = array_cache.max_bytes
+
+    assert plan.depth_chunks(150, '8GB') == (4, True)
+    chunk_size, in_memory = plan.depth_chunks(150, cache_bytes + 20 * slice_bytes)
+    assert not in_memory
+    assert 1 <= chunk_size <= 4
+    assert plan.depth_chunks(10, '{}KB'.format((cache_bytes + 40 * slice_bytes) // 1024)) == (4, True)
+
+    # The shared cache counts against the budget
+    with pytest.raises(MemoryError):
+        plan.depth_chunks(10, cache_bytes)
+
+    with pytest.raises(MemoryError):
+        plan.depth_chunks(10, '1MB')
+
+    with pytest.raises(ValueError):
+        plan.depth_chunks(10, 'eight gigabytes')
+
+def test_reconstruct_max_memory(array_cache):
+    """ Test that reconstructions larger than the memory budget are written to a memory map """
+    im = _example_hologram()
+    depths = np.linspace(0.1, 0.3, 6)
+    holo = Hologram(im)
+    holo.fit_phase_mask(0.2)
+    expected = holo.reconstruct(depths).reconstructed_wave
+
+    wave = holo.reconstruct(depths, max_memory = array_cache.max_bytes + 10 * 256**2 * 16).reconstructed_wave
+    assert isinstance(wave, np.memmap)
+    assert np.allclose(wave, expected)
+
+def test_rectangular_hologram():
+    """ Test that rectangular holograms are reconstructed with their full field of view """
+    im = _example_hologram()[:, :192]
+    holo = Hologram(im, crop_to_square = False)
+    holo.plan = ReconstructionPlan.from_hologram(holo, mask_radius = 31)
+    holo.fit_phase_mask(0.2)
+    assert holo.phase_mask_coefficients.shape == (6, 192, 1)
+
+    full = holo.reconstruct([0.2, 0.25]).reconstructed_wave
+    assert full.shape == (256, 192, 2, 1)
+
+    cropped = holo.reconstruct([0.2, 0.25], crop_sideband = True).reconstructed_wave
+    assert cropped.shape == (64, 64, 2, 1)
+    assert np.allclose(cropped, full[::4, ::3])
+
+def test_padded_hologram():
+    """ Test that holograms are padded to fast Fourier transform lengths """
+    im = _example_hologram()[:254, :241]
+    holo = Hologram(im, crop_to_square = False, pad = True)
+    assert holo.hologram.shape == (256, 243)
+    assert holo.padding == ((1, 1), (1, 1))
+    assert np.allclose(holo.hologram[1:-1, 1:-1], im)
+
+    w = holo.reconstruct(0.2)
+    assert w.reconstructed_wave.shape == (256, 243, 1, 1)
+
+def test_raw_hologram_dtype():
+    """ Test that integer holograms are kept in their native dtype, and reconstructed as floats """
+    im = np.random.randint(0, 4096, size = (256, 256)).astype(np.uint16)
+    raw = Hologram(im)
+    converted = Hologram(im.astype(np.float64))
+    assert raw.hologram.dtype == np.uint16
+    assert raw.rft_hologram.dtype == np.complex128
+    assert np.allclose(raw.ft_hologram, converted.ft_hologram)
+
+    single = Hologram(im, precision = 'single')
+    assert single.hologram.dtype == np.uint16
+    assert single.rft_hologram.dtype == np.complex64
+
+    # Padding with the mean value requires floating-point values
+    padded = Hologram(im[:254, :254], pad = True)
+    assert padded.hologram.dtype == np.float64
+
+def test_calibration():
+    """ Test that a calibration is applied to other holograms, and that drift is detected """
+    def fringes(kx, ky, dim = 256):
+        x, y = np.mgrid[0:dim, 0:dim]
+        return 1000 + 100*np.cos(2*np.pi*(kx*x + ky*y)/dim) + np.random.randn(dim, dim)
+
+    reference = Hologram(fringes(40, 60))
+    calibration = Calibration.from_hologram(reference)
+    assert calibration.spectral_peak.shape == (1, 2)
+    assert np.all(calibration.drift(reference) == 0)
+
+    shifted = Hologram(fringes(43, 60))
+    calibration.apply(shifted)
+    assert np.allclose(shifted.spectral_peak, reference.spectral_peak)
+    assert np.all(np.abs(calibration.drift(shifted)) == [[3, 0]])
+
+    with pytest.raises(UpdateError):
+        calibration.apply(Hologram(fringes(40, 60), wavelength = [450e-9, 550e-9]))
+
+    # Sub-pixel peaks are rounded to the nearest pixel
+    assert np.all(Calibration([10.6, 20.4]).spectral_peak == [[11, 20]])
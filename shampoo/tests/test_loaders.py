@@ -0,0 +1,90 @@
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import numpy as np
+
+from ..loaders import HologramStack, HologramLoader, tifffile
+from ..reconstruction import Hologram
+
+def _example_stack(directory, compression=None, byteorder=None):
+    """ Write a multi-page TIFF of three holograms in ``directory``, and return its path and the images """
+    images = np.random.randint(0, 4096, size = (3, 256, 256)).astype(np.uint16)
+    path = str(directory.join('test_loaders.tif'))
+    kwargs = {'photometric': 'minisblack'}
+    if compression is not None:
+        kwargs['compression'] = compression
+    if byteorder is not None:
+        kwargs['byteorder'] = byteorder
+    tifffile.imwrite(path, images, **kwargs)
+    return path, images
+
+def test_hologram_stack(tmpdir):
+    """ Test that the pages of a TIFF file are loaded as memory-mapped holograms """
+    path, images = _example_stack(tmpdir)
+    with HologramStack(path, wavelength = 405e-9) as stack:
+        assert len(stack) == 3
+        holograms = list(stack)
+        assert all(isinstance(h, Hologram) for h in holograms)
+        for hologram, image in zip(holograms, images):
+            assert hologram.hologram.dtype == np.uint16
+            assert np.all(hologram.hologram == image)
+
+        assert np.all(stack[-1].hologram == images[-1])
+        assert len(stack[1:]) == 2
+        assert isinstance(stack.image(0), np.memmap)
+    assert stack._buffer is None
+
+    w = holograms[1].reconstruct(0.2)
+    assert w.reconstructed_wave.shape == (256, 256, 1, 1)
+
+def test_hologram_stack_compressed(tmpdir):
+    """ Test that compressed pages are decoded on access """
+    path, images = _example_stack(tmpdir, compression = 'zlib')
+    with HologramStack(path) as stack:
+        assert len(stack) == 3
+        assert np.all(stack[2].hologram == images[2])
+
+def test_hologram_stack_big_endian(tmpdir):
+    """ Test that memory-mapped pages are read in the byte order of the file """
+    path, images = _example_stack(tmpdir, byteorder = '>')
+    with HologramStack(path) as stack:
+        image = stack.image(1)
+        assert isinstance(image, np.memmap)
+        assert np.all(image == images[1])
+        assert np.allclose(stack[1].ft_hologram, Hologram(images[1]).ft_hologram)
+
+class CountingLoader(HologramLoader):
+    """ HologramLoader that records the paths of loaded images """
+    def __init__(self, *args, **kwargs):
+        super(CountingLoader, self).__init__(*args, **kwargs)
+        self.loaded = list()
+
+    def _load(self, path):
+        self.loaded.append(path)
+        return super(CountingLoader, self)._load(path)
+
+def test_hologram_loader(tmpdir):
+    """ Test that prefetched holograms are loaded in order """
+    images = np.random.randint(0, 4096, size = (5, 64, 64)).astype(np.uint16)
+    paths = list()
+    for index, image in enumerate(images):
+        path = str(tmpdir.join('test_loader_{}.tif'.format(index)))
+        tifffile.imwrite(path, image, photometric = 'minisblack')
+        paths.append(path)
+
+    loader = CountingLoader(paths, workers = 1, prefetch = 2, wavelength = 405e-9)
+    assert len(loader) == 5
+    holograms = list(loader)
+    assert all(isinstance(h, Hologram) for h in holograms)
+    for hologram, image in zip(holograms, images):
+        assert np.all(hologram.hologram == image)
+    assert sorted(loader.loaded) == paths
+
+    # Stopping early does not load the remaining holograms: at most the
+    # prefetched holograms are loaded in addition to the first one
+    loader.loaded = list()
+    for hologram in loader:
+        break
+    assert np.all(hologram.hologram == images[0])
+    assert loader.loaded[0] == paths[0]
+    assert len(loader.loaded) <= 1 + loader.prefetch
@@ -6,8 +6,10 @@ import os.path
 import tempfile
 
 import numpy as np
+import pytest
 
-from ..reconstruction import RANDOM_SEED, Hologram, ReconstructedWave
+from .. import reconstruction
+from ..reconstruction import RANDOM_SEED, ArrayCache, Hologram, ReconstructedWave
 from ..time_series import TimeSeries
 
 np.random.seed(RANDOM_SEED)
@@ -63,6 +65,17 @@ def test_time_series_storing_hologram_three_wavelength():
         assert time_series.hologram(0).hologram.ndim == 2
         assert time_series.hologram(1).hologram.ndim == 2
 
+def test_time_series_storing_raw_hologram():
+    """ Test that integer holograms are stored and retrieved in their native dtype """
+    name = os.path.join(tempfile.gettempdir(), 'test_time_series.hdf5')
+    im = np.random.randint(0, 4096, size = (256, 256)).astype(np.uint16)
+    with TimeSeries(name = name, mode = 'w') as time_series:
+        time_series.add_hologram(Hologram(im), time_point = 0)
+        
+        retrieved = time_series.hologram(0)
+        assert retrieved.hologram.dtype == np.uint16
+        assert np.all(retrieved.hologram == im)
+
 def test_time_series_reconstruct_single_wavelength():
     name = os.path.join(tempfile.gettempdir(), 'test_time_series.hdf5')
     hologram = Hologram(_example_hologram())
@@ -127,4 +140,102 @@ def test_time_series_batch_reconstruct_three_wavelengths():
             h = Hologram(_example_hologram(), wavelength = [400e-9, 500e-9, 600e-9])
             time_series.add_hologram(h, time_point = time_point)
         
-        time_series.batch_reconstruct(propagation_distance = 1)
\ No newline at end of file
+        time_series.batch_reconstruct(propagation_distance = 1)
+
+def test_time_series_batch_reconstruct_reuse_phase_mask():
+    name = os.path.join(tempfile.gettempdir(), 'test_time_series.hdf5')
+
+    with TimeSeries(name = name, mode = 'w') as time_series:
+        for time_point in range(3):
+            h = Hologram(_example_hologram())
+            time_series.add_hologram(h, time_point = time_point)
+        
+        assert time_series.phase_mask_coefficients is None
+        time_series.batch_reconstruct(propagation_distance = [0.1, 0.2], reuse_phase_mask = True)
+        assert time_series.phase_mask_coefficients.shape == (6, 512, 1)
+
+def test_time_series_calibration():
+    name = os.path.join(tempfile.gettempdir(), 'test_time_series.hdf5')
+
+    with TimeSeries(name = name, mode = 'w') as time_series:
+        for time_point in range(3):
+            time_series.add_hologram(Hologram(_example_hologram()), time_point = time_point)
+        
+        assert time_series.calibration is None
+        time_series.batch_reconstruct(propagation_distance = 0.1, reuse_calibration = True)
+
+        calibration = time_series.calibration
+        assert calibration.spectral_peak.shape == (1, 2)
+        assert calibration.fourier_mask is None
+        for time_point in time_series.time_points:
+            hologram = time_series.hologram(time_point, calibrated = True)
+            assert np.all(hologram.spectral_peak.swapaxes(0,1) == calibration.spectral_peak)
+
+        # Holograms are returned as stored, unless requested otherwise
+        assert time_series.hologram(0)._spectral_peak is None
+
+def test_time_series_batch_reconstruct_uncalibrated():
+    name = os.path.join(tempfile.gettempdir(), 'test_time_series.hdf5')
+
+    with TimeSeries(name = name, mode = 'w') as time_series:
+        time_series.add_hologram(Hologram(_example_hologram()), time_point = 0)
+        time_series.calibrate(0, chromatic_shift = [0.05])
+
+        time_series.batch_reconstruct(propagation_distance = 0.1, reuse_calibration = True)
+        calibrated = np.array(time_series.reconstructed_wave(0).reconstructed_wave)
+        del time_series.reconstructed_group['0.0']
+        del time_series.fourier_mask_group['0.0']
+
+        # The stored calibration is only applied if requested
+        time_series.batch_reconstruct(propagation_distance = 0.1, reuse_calibration = False)
+        uncalibrated = time_series.reconstructed_wave(0).reconstructed_wave
+        expected = time_series.hologram(0).reconstruct(0.1).reconstructed_wave
+        atol = 1e-3 * np.abs(expected).max()
+        assert np.allclose(uncalibrated, expected, atol = atol)
+        assert not np.allclose(uncalibrated, calibrated, atol = atol)
+
+def test_time_series_batch_reconstruct_incremental():
+    name = os.path.join(tempfile.gettempdir(), 'test_time_series.hdf5')
+
+    with TimeSeries(name = name, mode = 'w') as time_series:
+        for time_point in range(2):
+            time_series.add_hologram(Hologram(_example_hologram()), time_point = time_point)
+        
+        depths = np.linspace(0.1, 0.2, 3)
+        time_series.batch_reconstruct(propagation_distance = depths, reuse_phase_mask = True,
+                                      propagation = 'incremental')
+        wave = time_series.reconstructed_wave(time_point = 1)
+        assert wave.reconstructed_wave.shape == (512, 512, 3, 1)
+
+def test_time_series_single_precision():
+    name = os.path.join(tempfile.gettempdir(), 'test_time_series.hdf5')
+
+    with TimeSeries(name = name, mode = 'w') as time_series:
+        time_series.add_hologram(Hologram(_example_hologram()), time_point = 0)
+        time_series.batch_reconstruct(propagation_distance = [0.1, 0.2], precision = 'single')
+        
+        assert time_series.reconstructed_group['0.0'].dtype == np.complex64
+        wave = time_series.reconstructed_wave(time_point = 0)
+        assert wave.reconstructed_wave.dtype == np.complex64
+
+def test_time_series_batch_reconstruct_max_memory(monkeypatch):
+    name = os.path.join(tempfile.gettempdir(), 'test_time_series.hdf5')
+    # The shared array cache counts against the memory budget
+    monkeypatch.setattr(reconstruction, '_array_cache', ArrayCache(max_bytes = '32MB'))
+
+    with TimeSeries(name = name, mode = 'w') as time_series:
+        time_series.add_hologram(Hologram(_example_hologram()), time_point = 0)
+        time_series.fit_phase_mask(0, 0.15)
+        expected = time_series.reconstruct(0, [0.1, 0.15, 0.2], 
+                                           phase_mask_coefficients = time_series.phase_mask_coefficients)
+        expected = np.array(expected.reconstructed_wave)
+        del time_series.reconstructed_group['0.0']
+        del time_series.fourier_mask_group['0.0']
+
+        time_series.batch_reconstruct(propagation_distance = [0.1, 0.15, 0.2], reuse_phase_mask = True,
+                                      max_memory = '128MB', outputs = ('wave',))
+        wave = time_series.reconstructed_wave(time_point = 0)
+        assert np.allclose(wave.reconstructed_wave, expected)
+
+        with pytest.raises(ValueError):
+            time_series.reconstruct(0, [], max_memory = '128MB')
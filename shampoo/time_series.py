@@ -12,7 +12,7 @@ from collections import Iterable
 import h5py
 import numpy as np
 
-from .reconstruction import Hologram, ReconstructedWave
+from .reconstruction import Calibration, Hologram, ReconstructedWave, ReconstructionPlan, Workspace
 
 class TimeSeries(h5py.File):
     """
@@ -41,6 +41,31 @@ class TimeSeries(h5py.File):
     def depths(self):
         return tuple(self.attrs.get('depths', default = tuple()))
 
+    @property
+    def phase_mask_coefficients(self):
+        """
+        Polynomial coefficients of the digital phase mask shared by all 
+        holograms, or None if it has not been fitted. See TimeSeries.fit_phase_mask().
+        """
+        if 'phase_mask_coefficients' not in self:
+            return None
+        return np.array(self['phase_mask_coefficients'])
+
+    @property
+    def calibration(self):
+        """
+        Calibration of the spectral peak, Fourier mask and chromatic shift shared by all 
+        holograms, or None if the TimeSeries has not been calibrated. See TimeSeries.calibrate().
+        """
+        if 'spectral_peak' not in self.attrs:
+            return None
+        fourier_mask = None
+        if 'calibration_fourier_mask' in self:
+            fourier_mask = np.array(self['calibration_fourier_mask'])
+        return Calibration(spectral_peak = self.attrs['spectral_peak'], 
+                           chromatic_shift = self.attrs.get('chromatic_shift', default = None),
+                           fourier_mask = fourier_mask)
+
     @property
     def hologram_group(self):
         return self.require_group('holograms')
@@ -69,8 +94,8 @@ class TimeSeries(h5py.File):
             If the hologram is not compatible with the current TimeSeries,
             e.g. the wavelengths do not match.
         """
-        # TODO: Holograms are stored as UINT8
-        #       Is that sensible?
+        # Raw holograms are stored in their native integer dtype (e.g. UINT16).
+        # Other holograms are stored as UINT8.
         holo_wavelengths = tuple(hologram.wavelength.reshape((-1)))
         time_point = float(time_point)
 
@@ -91,10 +116,13 @@ class TimeSeries(h5py.File):
             return gp[str(time_point)].write_direct(hologram.hologram)
         else:
             self.attrs['time_points'] = self.time_points + (time_point, )
+            dtype = hologram.hologram.dtype
+            if not np.issubdtype(dtype, np.integer):
+                dtype = np.uint8
             return gp.create_dataset(str(time_point), data = hologram.hologram, 
-                                     dtype = np.uint8, **self._default_ckwargs)
+                                     dtype = dtype, **self._default_ckwargs)
     
-    def hologram(self, time_point, **kwargs):
+    def hologram(self, time_point, calibrated = False, **kwargs):
         """
         Return Hologram object from archive. Keyword arguments are
         passed to the Hologram constructor.
@@ -103,6 +131,9 @@ class TimeSeries(h5py.File):
         ----------
         time_point : float
             Time-point in seconds.
+        calibrated : bool, optional
+            If True and the TimeSeries has been calibrated, the calibration 
+            is applied to the hologram. Default is False.
         
         Returns
         -------
@@ -117,11 +148,101 @@ class TimeSeries(h5py.File):
         if time_point not in self.time_points:
             raise ValueError('Time-point {} not in TimeSeries.'.format(time_point))
         
+        # The hologram is read in its stored integer dtype; see Hologram
         dset = self.hologram_group[str(time_point)]
-        return Hologram(np.array(dset), wavelength = self.wavelengths, **kwargs)
+        hologram = Hologram(dset[()], wavelength = self.wavelengths, **kwargs)
+
+        calibration = self.calibration
+        if calibrated and calibration is not None:
+            calibration.apply(hologram)
+        return hologram
+
+    def calibrate(self, time_point, fourier_mask = None, chromatic_shift = None):
+        """
+        Determine the spectral peak of the hologram at ``time_point``, and store it 
+        with the Fourier mask and chromatic shift, so that they are shared by all holograms 
+        of the TimeSeries. A previous calibration is replaced.
+
+        Parameters
+        ----------
+        time_point : float
+            Time-point in seconds.
+        fourier_mask : ndarray or None, optional
+            User-specified Fourier mask. Refer to Hologram.reconstruct()
+            documentation for details.
+        chromatic_shift : iterable or None, optional
+            Change in depth of focus for each wavelength, in meters.
+        
+        Returns
+        -------
+        calibration : Calibration
+        """
+        hologram = self.hologram(time_point)
+        if chromatic_shift is not None:
+            hologram.update_chromatic_shift(chromatic_shift)
+        calibration = Calibration.from_hologram(hologram, fourier_mask = fourier_mask)
+
+        self.attrs['spectral_peak'] = calibration.spectral_peak
+        self.attrs['chromatic_shift'] = calibration.chromatic_shift
+        # Fourier masks are too large for HDF5 attributes
+        if 'calibration_fourier_mask' in self:
+            del self['calibration_fourier_mask']
+        if calibration.fourier_mask is not None:
+            self.create_dataset('calibration_fourier_mask', data = calibration.fourier_mask)
+        return calibration
+
+    def fit_phase_mask(self, time_point, propagation_distance, fourier_mask = None,
+                       chromatic_shift = None, plan = None, propagation = 'direct', 
+                       precision = 'double', calibrated = True):
+        """
+        Fit the digital phase mask on the hologram at ``time_point``, and store
+        its coefficients so they can be shared by all holograms of the TimeSeries.
+        See Hologram.fit_phase_mask().
+
+        Parameters
+        ----------
+        time_point : float
+            Time-point in seconds.
+        propagation_distance : float
+            Propagation distance in meters.
+        fourier_mask : ndarray or None, optional
+            User-specified Fourier mask. Refer to Hologram.reconstruct()
+            documentation for details.
+        chromatic_shift : iterable or None, optional
+            Change in depth of focus for each wavelength, in meters.
+        plan : ReconstructionPlan or None, optional
+            Reconstruction plan shared by all holograms.
+        propagation : {'direct', 'incremental'}, optional
+            Propagation mode of subsequent reconstructions. Refer to 
+            Hologram.reconstruct() documentation for details.
+        precision : {'double', 'single'}, optional
+            Floating-point precision of the reconstruction.
+        calibrated : bool, optional
+            If True (default) and the TimeSeries has been calibrated, the calibration
+            is applied to the hologram. See TimeSeries.hologram().
+        
+        Returns
+        -------
+        coefficients : `~numpy.ndarray`
+            Polynomial coefficients of the digital phase mask.
+        """
+        hologram = self.hologram(time_point, calibrated = calibrated, precision = precision)
+        if plan is not None:
+            hologram.plan = plan
+        if chromatic_shift is not None:
+            hologram.update_chromatic_shift(chromatic_shift)
+        
+        coefficients = hologram.fit_phase_mask(propagation_distance, fourier_mask = fourier_mask,
+                                               propagation = propagation)
+
+        if 'phase_mask_coefficients' in self:
+            del self['phase_mask_coefficients']
+        self.create_dataset('phase_mask_coefficients', data = coefficients)
+        return coefficients
 
     def reconstruct(self, time_point, propagation_distance, 
-                    fourier_mask = None, **kwargs):
+                    fourier_mask = None, precision = 'double', max_memory = None, 
+                    calibrated = True, **kwargs):
         """
         Hologram reconstruction from Hologram.reconstruct(). Keyword arguments
         are also passed to Hologram.reconstruct()
@@ -134,27 +255,54 @@ class TimeSeries(h5py.File):
             Propagation distance in meters.
         fourier_mask : ndarray or None, optional
             User-specified Fourier mask. Refer to Hologram.reconstruct()
-            documentation for details.
+            documentation for details. If None (default) and the TimeSeries
+            has been calibrated, the calibrated Fourier mask is used.
+        precision : {'double', 'single'}, optional
+            Floating-point precision of the reconstruction. The reconstructed wave
+            is stored as complex128 in 'double' precision, and complex64 in 'single' precision.
+        max_memory : int, str or None, optional
+            Memory budget of the reconstruction in bytes, or as a string such as '8GB'.
+            If provided, propagation distances are reconstructed in chunks that fit in 
+            this budget and written directly to the HDF5 file.
+        calibrated : bool, optional
+            If True (default) and the TimeSeries has been calibrated, the calibration
+            and the calibrated Fourier mask are applied to the hologram. See TimeSeries.hologram().
         
         Returns
         -------
         out : ReconstructedWave object
             The ReconstructedWave is both stored in the TimeSeries HDF5 file
-            and returned to the user. 
+            and returned to the user. If ``max_memory`` is provided, the reconstructed
+            wave of the returned object is the HDF5 dataset itself.
+
+        Raises
+        ------
+        ValueError
+            If the ``outputs`` keyword argument does not include 'wave', or if no
+            propagation distance is given.
         """
         time_point = float(time_point)
         propagation_distance = np.atleast_1d(propagation_distance).tolist()
+        if not propagation_distance:
+            raise ValueError('At least one propagation distance is required.')
+        if 'wave' not in kwargs.get('outputs', ('wave',)):
+            raise ValueError("TimeSeries store complex reconstructed waves: outputs must include 'wave'.")
 
-        # TODO: provide an accumulator array for hologram.reconstruct()
-        #       so that depths are written to disk on the fly?
-        recon_wave = self.hologram(time_point).reconstruct(propagation_distance, 
-                                                           fourier_mask = fourier_mask,
-                                                           **kwargs)
-        
-        # TODO: provide support for re-reconstructing again with different parameters
+        calibration = self.calibration if calibrated else None
+        if fourier_mask is None and calibration is not None:
+            fourier_mask = calibration.fourier_mask
 
-        self.reconstructed_group.create_dataset(str(time_point), data = recon_wave.reconstructed_wave, 
-                                                dtype = np.complex, **self._default_ckwargs)
+        hologram = self.hologram(time_point, calibrated = calibrated, precision = precision)
+        if max_memory is None:
+            recon_wave = hologram.reconstruct(propagation_distance, fourier_mask = fourier_mask, **kwargs)
+        
+            # TODO: provide support for re-reconstructing again with different parameters
+            self.reconstructed_group.create_dataset(str(time_point), data = recon_wave.reconstructed_wave, 
+                                                    dtype = recon_wave.reconstructed_wave.dtype, 
+                                                    **self._default_ckwargs)
+        else:
+            recon_wave = self._reconstruct_to_dataset(hologram, str(time_point), propagation_distance, 
+                                                      fourier_mask, max_memory, **kwargs)
         self.reconstructed_group[str(time_point)].attrs['depths'] = propagation_distance
 
         self.fourier_mask_group.create_dataset(str(time_point), data = recon_wave.fourier_mask, 
@@ -164,6 +312,33 @@ class TimeSeries(h5py.File):
         # to anything that expect a reconstruct() method.
         return recon_wave
     
+    def _reconstruct_to_dataset(self, hologram, name, propagation_distance, fourier_mask, 
+                                max_memory, **kwargs):
+        """
+        Reconstruct ``hologram`` in chunks of propagation distances that fit in ``max_memory``, 
+        and write them in the reconstructed dataset ``name`` as they are computed.
+        """
+        plan = kwargs.get('plan') or hologram.plan
+        chunk_size, _ = plan.depth_chunks(len(propagation_distance), max_memory)
+
+        # Chunks of the complex wave are written to the dataset directly
+        kwargs.pop('outputs', None)
+        kwargs.pop('out', None)
+
+        dset, start = None, 0
+        for chunk in hologram.iter_reconstruct(propagation_distance, chunk_size = chunk_size, 
+                                               fourier_mask = fourier_mask, **kwargs):
+            wave = chunk.reconstructed_wave
+            if dset is None:
+                shape = wave.shape[:2] + (len(propagation_distance), wave.shape[3])
+                dset = self.reconstructed_group.create_dataset(name, shape = shape, dtype = wave.dtype,
+                                                               **self._default_ckwargs)
+            dset[:,:,start:start + wave.shape[2],:] = wave
+            start += wave.shape[2]
+        
+        return ReconstructedWave(reconstructed_wave = dset, fourier_mask = chunk.fourier_mask, 
+                                 wavelength = chunk.wavelength, depths = propagation_distance)
+
     def reconstructed_wave(self, time_point, **kwargs):
         """
         Returns the ReconstructedWave object from archive. 
@@ -199,7 +374,8 @@ class TimeSeries(h5py.File):
                                  wavelength = self.wavelengths, depths = gp[time_point].attrs['depths'])
         
     def batch_reconstruct(self, propagation_distance, fourier_mask = None,
-                          callback = None, **kwargs):
+                          callback = None, plan = None, reuse_phase_mask = False, 
+                          reuse_calibration = False, propagation = 'direct', precision = 'double', max_memory = None, **kwargs):
         """ 
         Reconstruct all the holograms stored in the TimeSeries. Keyword 
         arguments are passed to the Hologram.reconstruct() method. 
@@ -217,14 +393,62 @@ class TimeSeries(h5py.File):
             Callable that takes an int between 0 and 99. The callback will be
             called after each reconstruction with the proportion of completed
             reconstruction.
+        plan : ReconstructionPlan or None, optional
+            Reconstruction plan shared by all holograms. If None (default),
+            a plan is created from the first hologram and reused for all others.
+        reuse_phase_mask : bool, optional
+            If True, a single digital phase mask is used for the entire TimeSeries. 
+            If the TimeSeries has no stored phase mask coefficients, these are fitted 
+            on the first hologram, at the central propagation distance. Default is False.
+        reuse_calibration : bool, optional
+            If True, the spectral peak is searched only once for the entire TimeSeries.
+            If the TimeSeries has not been calibrated, it is calibrated on the first 
+            hologram. See TimeSeries.calibrate(). If False (default), a stored calibration
+            is not applied either, and the spectral peak of every hologram is searched.
+        propagation : {'direct', 'incremental'}, optional
+            If 'incremental', evenly-spaced propagation distances are stepped through
+            with the angular-spectrum transfer function. Refer to Hologram.reconstruct() 
+            documentation for details. Default is 'direct'.
+        precision : {'double', 'single'}, optional
+            Floating-point precision of the reconstructions. Default is 'double'.
+        max_memory : int, str or None, optional
+            Memory budget of each reconstruction in bytes, or as a string such as '8GB'.
+            Reconstructed waves are then written to the HDF5 file chunk by chunk. 
+            Default is None, where memory usage is not restricted.
+        
+        Scratch arrays are shared by all reconstructions, unless a ``workspace`` keyword 
+        argument is provided.
         """
         if callback is None:
             callback = lambda i: None 
             
         total = len(self.time_points)
+        if total == 0:
+            return
+
+        if plan is None:
+            plan = ReconstructionPlan.from_hologram(self.hologram(self.time_points[0], precision = precision))
+
+        if reuse_calibration and self.calibration is None:
+            self.calibrate(self.time_points[0], fourier_mask = fourier_mask, 
+                           chromatic_shift = kwargs.get('chromatic_shift'))
+
+        if reuse_phase_mask:
+            coefficients = self.phase_mask_coefficients
+            if coefficients is None:
+                distances = np.atleast_1d(propagation_distance)
+                coefficients = self.fit_phase_mask(self.time_points[0], distances[len(distances)//2],
+                                                   fourier_mask = fourier_mask, plan = plan,
+                                                   chromatic_shift = kwargs.get('chromatic_shift'),
+                                                   propagation = propagation, precision = precision,
+                                                   calibrated = reuse_calibration)
+            kwargs['phase_mask_coefficients'] = coefficients
         
+        kwargs.setdefault('workspace', Workspace())
         for index, time_point in enumerate(self.time_points):
             self.reconstruct(time_point = time_point, 
                              propagation_distance = propagation_distance,
-                             fourier_mask = fourier_mask, **kwargs)
+                             fourier_mask = fourier_mask, plan = plan, 
+                             propagation = propagation, precision = precision, 
+                             max_memory = max_memory, calibrated = reuse_calibration, **kwargs)
             callback(int(100*index / total))
\ No newline at end of file